@@ -135,6 +135,19 @@ def install_python_packages(selected_packages=None):
         print(f"✅ {pkg} installed.\n")
 
 # ---------------- Setup AllTool ----------------
+# ~/bin/alltool only imports AllTools.py, so Python can cache the module's
+# bytecode in ~/bin/__pycache__ instead of recompiling it on every call.
+LAUNCHER = """#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import AllTools
+
+if __name__ == "__main__":
+    AllTools.main()
+"""
+
 def setup_alltool():
     """Setup AllTool in the system"""
     print("🔧 Setting up AllTool...")
@@ -147,23 +160,33 @@ def setup_alltool():
     os.makedirs(bin_dir, exist_ok=True)
 
     # Copy script to bin directory
+    module_path = os.path.join(bin_dir, "AllTools.py")
     target_path = os.path.join(bin_dir, "alltool")
 
     if not os.path.exists(script_path):
         print("❌ AllTools.py not found in installer directory.")
         return False
 
-    if os.path.abspath(script_path) == os.path.abspath(target_path):
+    if os.path.abspath(script_path) == os.path.abspath(module_path):
         print(f"ℹ️ Source and destination are the same ({script_path}). Skipping copy.")
     else:
         try:
-            shutil.copy(script_path, target_path)
-            os.chmod(target_path, 0o755)
-            print(f"✅ AllTools.py copied to {target_path}")
+            shutil.copy(script_path, module_path)
+            os.chmod(module_path, 0o755)
+            print(f"✅ AllTools.py copied to {module_path}")
         except Exception as e:
             print(f"❌ Failed to copy AllTools.py: {e}")
             return False
 
+    try:
+        with open(target_path, "w") as f:
+            f.write(LAUNCHER)
+        os.chmod(target_path, 0o755)
+        print(f"✅ Launcher created at {target_path}")
+    except Exception as e:
+        print(f"❌ Failed to create launcher: {e}")
+        return False
+
     # Update PATH temporarily
     os.environ["PATH"] = os.path.expanduser("~/bin:") + os.environ["PATH"]
     print("✅ PATH temporarily updated.")
@@ -1,19 +1,87 @@
 #!/usr/bin/env python3
-import cmd
+# Keep top-level imports minimal: alltool runs from shell loops and prompts, so
+# startup is the hot path. Heavy modules (even subprocess) are imported by the
+# functions using them.
 import sys
-import subprocess
 import os
-import subprocess
-import random
-import string
-import hashlib
 import time
-import requests, re
-import json
-import signal
 
 LOCAL_PATH = "~/bin/AllTool.py"
 
+HASH_TYPES = ("md5", "sha1", "sha256", "sha512", "blake2b", "blake2s")
+HASH_BUFFER_SIZE = 1024 * 1024  # 1 MiB chunks keep memory flat for any file size
+HASH_PROGRESS_MIN_SIZE = 256 * 1024 * 1024  # only show progress for big files
+HASH_DROP_CACHE_STEP = 64 * 1024 * 1024
+HASH_CACHE_PATH = os.path.expanduser("~/.cache/alltool/hashes.db")
+HASH_CACHE_MAX_ENTRIES = 500000
+DUP_SAMPLE_SIZE = 64 * 1024  # bytes hashed from each end of a file before a full read
+# Private (0700) directory: the socket receives each client's environment and terminal
+DAEMON_DIR = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or "/tmp", f"alltool-{os.getuid()}"
+)
+DAEMON_SOCKET = os.path.join(DAEMON_DIR, "daemon.sock")
+DAEMON_PID_FILE = os.path.join(DAEMON_DIR, "daemon.pid")
+# Commands that must never be forwarded to the daemon. Daemon workers have no
+# controlling terminal, so anything that may open /dev/tty (sudo password prompts,
+# mpv key controls, arbitrary user scripts) runs in-process as well.
+LOCAL_COMMANDS = {
+    "daemon", "shell", "--startup-time",
+    "format", "up", "power", "run", "sound", "video",
+}
+PATH_INDEX_FILE = os.path.expanduser("~/.cache/alltool/path_index.bin")
+_path_index = None  # ((python version, PATH dirs, their mtimes), {name: path})
+REQUIREMENT_CACHE_FILE = os.path.expanduser("~/.cache/alltool/requirement.json")
+PROBE_TIMEOUT = 3  # seconds per version probe
+BUILD_CACHE_DIR = os.path.expanduser("~/.cache/alltool/build")
+BUILD_CACHE_MAX_ENTRIES = 200
+LINK_FLAG_PREFIXES = ("-l", "-L", "-Wl,")  # passed after the source file
+JOB_LOG_DIR = os.path.expanduser("~/.local/share/alltool/logs")
+WATCH_DEBOUNCE = 0.2  # seconds of quiet before a rerun
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+_http_session = None  # shared requests.Session, see http_session()
+SEARCH_CHUNK_SIZE = 16 * 1024
+SEARCH_DRAIN_LIMIT = 1024 * 1024  # max bytes read past the last result to keep a connection
+# ALLTOOL_SEARCH_URL points the search at a local stand-in serving saved pages
+SEARCH_URL = "https://html.duckduckgo.com/html/"
+SEARCH_CACHE_PATH = os.path.expanduser("~/.cache/alltool/search.db")
+SEARCH_CACHE_TTL = 24 * 3600  # seconds; ALLTOOL_SEARCH_TTL overrides
+SEARCH_CACHE_MAX_ENTRIES = 5000
+# ALLTOOL_WEATHER_URL replaces wttr.in, e.g. with a local stand-in for tests
+WEATHER_URL = "https://wttr.in/"
+WEATHER_CACHE_FILE = os.path.expanduser("~/.cache/alltool/weather.json")
+WEATHER_TTL = 600  # seconds; ALLTOOL_WEATHER_TTL overrides
+DOWNLOAD_DB_PATH = os.path.expanduser("~/.local/share/alltool/downloads.db")
+DOWNLOAD_LOG_DIR = os.path.expanduser("~/.local/share/alltool/logs/downloads")
+LIBRARY_DB_PATH = os.path.expanduser("~/.local/share/alltool/library.db")
+MEDIA_EXTENSIONS = (
+    ".wav", ".mp3", ".ogg", ".opus", ".flac", ".aac", ".m4a",
+    ".mp4", ".mkv", ".webm", ".avi", ".mov", ".m4v",
+)
+MEDIA_QUERY_FIELDS = ("artist", "album", "title", "genre", "codec", "kind")
+UPDATE_CACHE_FILE = os.path.expanduser("~/.cache/alltool/updates.json")
+UPDATE_TTL = 6 * 3600  # seconds; ALLTOOL_UPDATE_TTL overrides, read per call for the daemon
+VERSION_PROBES = {
+    "mpv": ["--version"],
+    "ffmpeg": ["-version"],
+    "ffplay": ["-version"],
+    "ffprobe": ["-version"],
+    "speedtest-cli": ["--version"],
+    "yt-dlp": ["--version"],
+    "inxi": ["--version"],
+    "systemctl": ["--version"],
+    "python3": ["--version"],
+    "node": ["--version"],
+    "perl": ["-e", "print $^V"],
+    "ruby": ["--version"],
+    "php": ["--version"],
+    "java": ["-version"],
+    "g++": ["--version"],
+    "apt": ["--version"],
+    "pacman": ["--version"],
+    "dnf": ["--version"],
+    "zypper": ["--version"],
+}
+
 
 def uncon():
     confirm = input(
@@ -56,6 +124,8 @@ def sun():
 
 
 def get_output(cmd):
+    import subprocess
+
     try:
         result = subprocess.run(
             cmd,
@@ -69,231 +139,2333 @@ def get_output(cmd):
         return ""
 
 
+def path_state():
+    dirs = [folder for folder in os.environ.get("PATH", "").split(os.pathsep) if folder]
+    mtimes = []
+    for folder in dirs:
+        try:
+            mtimes.append(os.stat(folder).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return (sys.version, dirs, mtimes)
+
+
+def path_index():
+    # One scandir per PATH entry instead of one `which` process per lookup. The
+    # index is saved to disk and reused until a PATH directory's mtime changes,
+    # and re-validated on each call so the daemon and shell see new tools too.
+    global _path_index
+    key = path_state()
+    if _path_index and _path_index[0] == key:
+        return _path_index[1]
+
+    import marshal
+
+    try:
+        with open(PATH_INDEX_FILE, "rb") as f:
+            saved_key, index = marshal.load(f)
+        if saved_key == key:
+            _path_index = (key, index)
+            return index
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    index = {}
+    for folder in key[1]:
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name in index:
+                        continue  # an earlier PATH entry wins, like the shell
+                    try:
+                        mode = entry.stat().st_mode
+                    except OSError:
+                        continue
+                    if mode & 0o170000 == 0o100000 and mode & 0o111:
+                        index[entry.name] = entry.path
+        except OSError:
+            continue
+
+    try:
+        os.makedirs(os.path.dirname(PATH_INDEX_FILE), exist_ok=True)
+        tmp_path = f"{PATH_INDEX_FILE}.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            marshal.dump((key, index), f)
+        os.replace(tmp_path, PATH_INDEX_FILE)
+    except OSError:
+        pass
+    _path_index = (key, index)
+    return index
+
+
+def which(cmd):
+    if os.sep in cmd:
+        return cmd if os.access(cmd, os.X_OK) else None
+    return path_index().get(cmd)
+
+
 def has_command(cmd):
-    return (
-        subprocess.run(
-            ["which", cmd], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-        ).returncode
-        == 0
-    )
+    return which(cmd) is not None
 
 
-def check_updates():
-    if has_command("apt"):
-        print("🔍 Checking for updates (APT)...")
-        subprocess.run(["sudo", "apt", "update"], stdout=subprocess.DEVNULL)
-        output = get_output(["apt", "list", "--upgradable"])
-        lines = [line for line in output.splitlines() if "/" in line]
-        if lines:
-            print(f"⚠️ {len(lines)} updates not installed.")
-        else:
-            print("✅ No updates available.")
+def probe_version(path, probe_args):
+    import re
+    import subprocess
 
-    elif has_command("checkupdates"):
-        print("🔍 Checking for updates (Pacman)...")
-        output = get_output(["checkupdates"])
-        lines = [line for line in output.splitlines() if line.strip()]
-        if lines:
-            print(f"⚠️ {len(lines)} updates not installed.")
-        else:
-            print("✅ No updates available.")
+    try:
+        result = subprocess.run(
+            [path] + probe_args,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            timeout=PROBE_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r"\d+(?:\.\d+)+", result.stdout + result.stderr)
+    return match.group(0) if match else None
 
-    elif has_command("dnf"):
-        print("🔍 Checking for updates (DNF)...")
-        output = get_output(["dnf", "check-update"])
-        lines = [
-            line
-            for line in output.splitlines()
-            if line and not line.startswith("Last metadata")
-        ]
-        if lines:
-            print(f"⚠️ {len(lines)} updates not installed.")
-        else:
-            print("✅ No updates available.")
 
+def check_requirement(name, kind, module=None):
+    from importlib.util import find_spec
+
+    result = {"name": name, "kind": kind, "installed": False, "path": None, "version": None}
+    if kind == "python":
+        # find_spec locates modules without importing (and running) them
+        if find_spec(module):
+            from importlib import metadata
+
+            result["installed"] = True
+            try:
+                result["version"] = metadata.version(name)
+            except metadata.PackageNotFoundError:
+                pass
+    elif kind == "builtin":
+        result["installed"] = find_spec(name) is not None
+    else:
+        result["path"] = which(name)
+        result["installed"] = result["path"] is not None
+        if result["installed"] and name in VERSION_PROBES:
+            result["version"] = probe_version(result["path"], VERSION_PROBES[name])
+    return result
+
+
+def requirement_state():
+    # Results stay valid until PATH directories or Python's import paths change
+    site_dirs = []
+    for folder in sys.path:
+        try:
+            site_dirs.append([folder, os.stat(folder).st_mtime_ns])
+        except OSError:
+            continue
+    return {"path": list(path_state()), "site": site_dirs}
+
+
+def load_requirement_cache(state):
+    import json
+
+    try:
+        with open(REQUIREMENT_CACHE_FILE) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if saved.get("state") != state:
+        return None
+    return saved.get("results")
+
+
+def save_requirement_cache(state, results):
+    import json
+
+    try:
+        os.makedirs(os.path.dirname(REQUIREMENT_CACHE_FILE), exist_ok=True)
+        tmp_path = f"{REQUIREMENT_CACHE_FILE}.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump({"state": state, "results": results}, f)
+        os.replace(tmp_path, REQUIREMENT_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def parse_apt_updates(output):
+    # pkg/suite 1.2-3 amd64 [upgradable from: 1.2-2]
+    packages = []
+    for line in output.splitlines():
+        if "/" not in line:
+            continue
+        fields = line.split()
+        current = None
+        if "from:" in fields:
+            current = fields[fields.index("from:") + 1].rstrip("]")
+        packages.append(
+            {
+                "name": fields[0].split("/")[0],
+                "current": current,
+                "candidate": fields[1] if len(fields) > 1 else None,
+            }
+        )
+    return packages
+
+
+def parse_pacman_updates(output):
+    # pkg 1.2-2 -> 1.2-3
+    packages = []
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) == 4 and fields[2] == "->":
+            packages.append({"name": fields[0], "current": fields[1], "candidate": fields[3]})
+    return packages
+
+
+def parse_dnf_updates(output):
+    # pkg.arch  1.2-3.fc39  updates   (check-update does not show installed versions)
+    packages = []
+    for line in output.splitlines():
+        if line.startswith("Obsoleting"):
+            break
+        fields = line.split()
+        if len(fields) != 3 or line.startswith(("Last metadata", " ")):
+            continue
+        packages.append({"name": fields[0].rsplit(".", 1)[0], "current": None, "candidate": fields[1]})
+    return packages
+
+
+def parse_zypper_updates(output):
+    # v | repo | pkg | 1.2-2 | 1.2-3 | x86_64
+    packages = []
+    for line in output.splitlines():
+        if not line.startswith(("v ", "i ")):
+            continue
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) >= 5:
+            packages.append({"name": fields[2], "current": fields[3], "candidate": fields[4]})
+    return packages
+
+
+def collect_updates():
+    import subprocess
+
+    # sudo must not wait for a password when nobody can type one (background refresh)
+    if os.geteuid() == 0:
+        sudo = []
+    elif sys.stdin and sys.stdin.isatty():
+        sudo = ["sudo"]
+    else:
+        sudo = ["sudo", "-n"]
+    refresh_error = None
+    if has_command("apt"):
+        manager = "apt"
+        result = subprocess.run(
+            sudo + ["apt", "update"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if result.returncode != 0:
+            # e.g. sudo -n without NOPASSWD: the listing below comes from old metadata
+            lines = [line.strip() for line in result.stderr.splitlines() if line.strip()]
+            refresh_error = lines[-1] if lines else f"apt update exited with {result.returncode}"
+        command, parser = ["apt", "list", "--upgradable"], parse_apt_updates
+    elif has_command("checkupdates"):
+        manager = "pacman"
+        command, parser = ["checkupdates"], parse_pacman_updates
+    elif has_command("dnf"):
+        manager = "dnf"
+        command, parser = ["dnf", "check-update"], parse_dnf_updates
     elif has_command("zypper"):
-        print("🔍 Checking for updates (Zypper)...")
-        output = get_output(["zypper", "list-updates"])
-        lines = [
-            line
-            for line in output.splitlines()
-            if line.startswith("v ") or line.startswith("i ")
-        ]
-        if lines:
-            print(f"⚠️ {len(lines)} updates not installed.")
+        manager = "zypper"
+        command, parser = ["zypper", "list-updates"], parse_zypper_updates
+    else:
+        return None
+
+    # checkupdates and dnf use non-zero exit codes to report updates, so no check=True
+    result = subprocess.run(
+        command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    report = {"manager": manager, "checked_at": time.time(), "packages": parser(result.stdout)}
+    if refresh_error:
+        report["refresh_failed"] = refresh_error
+    return report
+
+
+def load_update_cache():
+    import json
+
+    try:
+        with open(UPDATE_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def refresh_update_cache():
+    import fcntl
+    import json
+
+    os.makedirs(os.path.dirname(UPDATE_CACHE_FILE), exist_ok=True)
+    with open(UPDATE_CACHE_FILE + ".lock", "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # Another refresh is running; wait for it and reuse its result
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return load_update_cache()
+        report = collect_updates()
+        if report is None:
+            return None
+        tmp_path = f"{UPDATE_CACHE_FILE}.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(report, f)
+        os.replace(tmp_path, UPDATE_CACHE_FILE)
+        return report
+
+
+def refresh_update_cache_in_background():
+    import subprocess
+
+    env = dict(os.environ, ALLTOOL_NO_DAEMON="1")
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "up", "--refresh", "--json"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        env=env,
+    )
+
+
+def check_updates(ttl=None, refresh=False, background=False, as_json=False):
+    if ttl is None:
+        ttl = int(os.environ.get("ALLTOOL_UPDATE_TTL", UPDATE_TTL))
+    report = None if refresh else load_update_cache()
+    stale = report is None or time.time() - report.get("checked_at", 0) > ttl
+    if stale and background and report is not None:
+        # Answer from the stale cache now and refresh for the next call
+        refresh_update_cache_in_background()
+    elif stale:
+        if not as_json:
+            print("🔍 Checking for updates...")
+        report = refresh_update_cache()
+        stale = False
+
+    if report is None:
+        if as_json:
+            print('{"error": "no supported package manager found"}')
         else:
-            print("✅ No updates available.")
+            print("❌ No supported package manager found.")
+        return
+
+    if as_json:
+        import json
+
+        print(json.dumps(dict(report, stale=stale), indent=2))
+        return
 
+    age = int(time.time() - report["checked_at"]) // 60
+    packages = report["packages"]
+    if report.get("refresh_failed"):
+        print(f"⚠️ Package lists could not be refreshed ({report['refresh_failed']}); results may be outdated.")
+        print("💡 Run 'alltool up --refresh' in a terminal to refresh them.")
+    if packages:
+        print(f"⚠️ {len(packages)} updates not installed. ({report['manager']}, checked {age} min ago)")
+        for package in packages:
+            current = package["current"] or "?"
+            print(f"  {package['name']:<32} {current} → {package['candidate']}")
     else:
-        print("❌ No supported package manager found.")
+        print(f"✅ No updates available. ({report['manager']}, checked {age} min ago)")
 
 
-def detect_and_run(script_path):
-    if not os.path.isfile(script_path):
-        print(f"❌ File not found: {script_path}")
-        return
+def local_includes(source_path, seen=None):
+    # Headers pulled in with #include "..." are part of the build key; system
+    # headers are covered by the compiler identity.
+    import re
+
+    seen = set() if seen is None else seen
+    try:
+        with open(source_path, "rb") as f:
+            text = f.read()
+    except OSError:
+        return seen
+    folder = os.path.dirname(source_path)
+    for name in re.findall(rb'^\s*#\s*include\s*"([^"]+)"', text, re.MULTILINE):
+        header = os.path.normpath(os.path.join(folder, os.fsdecode(name)))
+        if header not in seen and os.path.isfile(header):
+            seen.add(header)
+            local_includes(header, seen)
+    return seen
+
+
+def prune_build_cache():
+    entries = []
+    for entry in walk_files(BUILD_CACHE_DIR):
+        try:
+            entries.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            continue
+    entries.sort()
+    for _, path in entries[: max(0, len(entries) - BUILD_CACHE_MAX_ENTRIES)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def build_cached(source_path, cflags=(), out=None):
+    # Progress goes to out (stdout by default), so callers printing JSON can divert it
+    import hashlib
+    import subprocess
+
+    _, ext = os.path.splitext(source_path)
+    if ext == ".c":
+        compiler = os.environ.get("CC", "gcc")
+    else:
+        compiler = os.environ.get("CXX", "g++")
+    compiler_path = which(compiler)
+    if compiler_path is None:
+        print(f"❌ Compiler not found: {compiler}", file=out)
+        return None
+
+    # Key: compiler binary identity + flags + source and local header contents
+    key = hashlib.sha256()
+    compiler_stat = os.stat(compiler_path)
+    key.update(f"{os.path.realpath(compiler_path)}\0{compiler_stat.st_size}\0{compiler_stat.st_mtime_ns}\0".encode())
+    key.update("\0".join(cflags).encode() + b"\0")
+    for path in [source_path] + sorted(local_includes(source_path)):
+        with open(path, "rb") as f:
+            key.update(hashlib.sha256(f.read()).digest())
+    digest = key.hexdigest()
+    output_exe = os.path.join(BUILD_CACHE_DIR, digest[:2], digest)
+
+    if os.path.exists(output_exe):
+        os.utime(output_exe)  # mark as recently used for pruning
+        print(f"⚡ Build cache hit ({digest[:12]})", file=out)
+        return output_exe
 
+    print(f"🔨 Compiling with {compiler} {' '.join(cflags)}".rstrip(), file=out)
+    os.makedirs(os.path.dirname(output_exe), exist_ok=True)
+    # Build to a private name and rename, so concurrent runs never see a partial binary
+    tmp_exe = f"{output_exe}.{os.getpid()}.tmp"
+    start = time.perf_counter()
+    # Libraries must follow the source, or ld --as-needed drops them before seeing a use
+    link_flags = [flag for flag in cflags if flag.startswith(LINK_FLAG_PREFIXES)]
+    compile_flags = [flag for flag in cflags if not flag.startswith(LINK_FLAG_PREFIXES)]
+    result = subprocess.run(
+        [compiler_path, *compile_flags, source_path, *link_flags, "-o", tmp_exe], stdout=out
+    )
+    if result.returncode != 0:
+        print("❌ Compilation failed.", file=out)
+        try:
+            os.remove(tmp_exe)
+        except OSError:
+            pass
+        return None
+    os.replace(tmp_exe, output_exe)
+    print(f"✅ Compiled in {time.perf_counter() - start:.2f}s ({digest[:12]})", file=out)
+    prune_build_cache()
+    return output_exe
+
+
+def script_command(script_path, cflags=(), out=None):
     _, ext = os.path.splitext(script_path)
 
     # Extension-based detection
     if ext == ".py":
-        print("🚀 Running Python script...")
-        subprocess.run(["python", script_path])
+        return "🚀 Running Python script...", ["python", script_path]
     elif ext == ".sh":
-        print("🚀 Running Shell script...")
-        subprocess.run(["bash", script_path])
+        return "🚀 Running Shell script...", ["bash", script_path]
     elif ext == ".js":
-        print("🚀 Running JavaScript script...")
-        subprocess.run(["node", script_path])
+        return "🚀 Running JavaScript script...", ["node", script_path]
     elif ext == ".pl":
-        print("🚀 Running Perl script...")
-        subprocess.run(["perl", script_path])
+        return "🚀 Running Perl script...", ["perl", script_path]
     elif ext == ".rb":
-        print("🚀 Running Ruby script...")
-        subprocess.run(["ruby", script_path])
+        return "🚀 Running Ruby script...", ["ruby", script_path]
     elif ext == ".php":
-        print("🚀 Running PHP script...")
-        subprocess.run(["php", script_path])
+        return "🚀 Running PHP script...", ["php", script_path]
     elif ext == ".jar":
-        print("🚀 Running Java JAR...")
-        subprocess.run(["java", "-jar", script_path])
-    elif ext == ".cpp" or ext == ".cc" or ext == ".c":
-        print("🚀 Compiling and running C/C++ code...")
-        output_exe = "/tmp/temp_executable"
-        subprocess.run(["g++", script_path, "-o", output_exe])
-        subprocess.run([output_exe])
+        return "🚀 Running Java JAR...", ["java", "-jar", script_path]
+    elif ext in (".c", ".cc", ".cpp", ".cxx"):
+        output_exe = build_cached(script_path, cflags, out)
+        if output_exe is None:
+            return None
+        return "🚀 Running C/C++ program...", [output_exe]
     else:
         # Fallback: check shebang
         with open(script_path, "r") as f:
             first_line = f.readline().strip()
         if first_line.startswith("#!"):
-            print(f"🚀 Running via shebang: {first_line}")
-            subprocess.run([script_path])
+            return f"🚀 Running via shebang: {first_line}", [script_path]
+        print("❌ Unknown script type. Please specify manually.", file=out)
+        return None
+
+
+def detect_and_run(script_path, cflags=()):
+    import subprocess
+
+    if not os.path.isfile(script_path):
+        print(f"❌ File not found: {script_path}")
+        return
+
+    command = script_command(script_path, cflags)
+    if command is None:
+        return
+    label, argv = command
+    print(label)
+    subprocess.run(argv)
+
+
+def summarize(samples):
+    import statistics
+
+    ordered = sorted(samples)
+    # nearest-rank percentile
+    p95 = ordered[max(0, -(-len(ordered) * 95 // 100) - 1)]
+    return {
+        "mean": statistics.fmean(ordered),
+        "median": statistics.median(ordered),
+        "p95": p95,
+        "stddev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def bench_script(script_path, runs, warmup=1, cflags=(), as_json=False):
+    import subprocess
+
+    # With --json, stdout carries only the report
+    out = sys.stderr if as_json else None
+    if not os.path.isfile(script_path):
+        print(f"❌ File not found: {script_path}", file=out)
+        return 1
+    # Any compilation happens here, outside the timed runs
+    command = script_command(script_path, cflags, out)
+    if command is None:
+        return 1
+    _, argv = command
+
+    samples = []
+    failures = 0
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(argv, stdout=subprocess.DEVNULL)
+        # wait4 gives this child's own rusage, unlike the RUSAGE_CHILDREN totals
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if i < warmup:
+            continue
+        if process.returncode != 0:
+            failures += 1
+        samples.append(
+            {
+                "wall_ms": wall * 1000,
+                "user_ms": usage.ru_utime * 1000,
+                "sys_ms": usage.ru_stime * 1000,
+                "max_rss_kb": usage.ru_maxrss,  # kilobytes on Linux
+                "exit_code": process.returncode,
+            }
+        )
+        if not as_json:
+            sys.stderr.write(f"\r⏱️ Run {len(samples)}/{runs}")
+            sys.stderr.flush()
+
+    metrics = {
+        name: summarize([sample[name] for sample in samples])
+        for name in ("wall_ms", "user_ms", "sys_ms", "max_rss_kb")
+    }
+    if as_json:
+        import json
+
+        report = {
+            "script": script_path,
+            "command": argv,
+            "runs": runs,
+            "warmup": warmup,
+            "failures": failures,
+            "metrics": metrics,
+            "samples": samples,
+        }
+        print(json.dumps(report, indent=2))
+        return 1 if failures else 0
+
+    sys.stderr.write("\n")
+    print(f"📊 {script_path}: {runs} runs, {warmup} warmup")
+    print(f"{'':<12} {'mean':>10} {'median':>10} {'p95':>10} {'stddev':>10} {'min':>10} {'max':>10}")
+    labels = {
+        "wall_ms": "wall (ms)",
+        "user_ms": "user (ms)",
+        "sys_ms": "sys (ms)",
+        "max_rss_kb": "RSS (KB)",
+    }
+    for name, stats in metrics.items():
+        row = " ".join(f"{stats[key]:>10.1f}" for key in ("mean", "median", "p95", "stddev", "min", "max"))
+        print(f"{labels[name]:<12} {row}")
+    if failures:
+        print(f"⚠️ {failures} of {runs} runs exited with a non-zero status.")
+        return 1
+    return 0
+
+
+def read_job_file(path):
+    import shlex
+
+    jobs = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                jobs.append(shlex.split(line))
+    return jobs
+
+
+def run_job(index, job, argv, log_dir):
+    import subprocess
+
+    name = os.path.basename(job[0])
+    log_path = os.path.join(log_dir, f"{index:02d}-{name}.log")
+    start = time.perf_counter()
+    with open(log_path, "wb") as log:
+        try:
+            result = subprocess.run(
+                argv + job[1:], stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT
+            )
+            exit_code = result.returncode
+        except OSError as e:
+            log.write(f"{e}\n".encode())
+            exit_code = 127
+    return exit_code, time.perf_counter() - start, log_path
+
+
+def run_jobs(jobs, workers, cflags=()):
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    log_dir = os.path.join(JOB_LOG_DIR, time.strftime("run-%Y%m%d-%H%M%S"))
+    os.makedirs(log_dir, exist_ok=True)
+
+    # Resolve (and compile) every job first, so a broken job list fails fast
+    commands = []
+    for job in jobs:
+        script_path = os.path.expanduser(job[0])
+        if not os.path.isfile(script_path):
+            print(f"❌ File not found: {script_path}")
+            return 1
+        command = script_command(script_path, cflags)
+        if command is None:
+            return 1
+        commands.append(command[1])
+
+    print(f"🚀 Running {len(jobs)} jobs with {workers} workers (logs: {log_dir})")
+    results = [None] * len(jobs)
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {
+            executor.submit(run_job, i + 1, job, argv, log_dir): i
+            for i, (job, argv) in enumerate(zip(jobs, commands))
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            exit_code, duration, _ = results[i]
+            status = "✅" if exit_code == 0 else "❌"
+            print(f"{status} [{done}/{len(jobs)}] {jobs[i][0]} ({duration:.1f}s)")
+    except KeyboardInterrupt:
+        executor.shutdown(wait=False, cancel_futures=True)
+        print("\n⏹️ Interrupted; queued jobs were cancelled.")
+        return 130
+    executor.shutdown()
+
+    failed = 0
+    print(f"\n{'#':>3}  {'job':<32} {'exit':>5} {'time':>9}  log")
+    for i, (job, (exit_code, duration, log_path)) in enumerate(zip(jobs, results), 1):
+        if exit_code != 0:
+            failed += 1
+        print(f"{i:>3}  {job[0]:<32} {exit_code:>5} {duration:>8.1f}s  {log_path}")
+    print(f"⏱️ {len(jobs)} jobs in {time.perf_counter() - start:.1f}s, {failed} failed.")
+    return 1 if failed else 0
+
+
+def inotify_open(directory):
+    import ctypes
+    import ctypes.util
+
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    # IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE; not IN_MODIFY,
+    # which fires for every write() to a log file the script keeps open
+    mask = 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        error = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(error, f"cannot watch {directory}")
+    return fd
+
+
+def read_inotify_names(fd):
+    import struct
+
+    names = []
+    while True:
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = struct.unpack_from("iIII", data, offset)
+            offset += 16
+            names.append(data[offset : offset + length].rstrip(b"\0").decode(errors="replace"))
+            offset += length
+
+
+def is_watch_noise(name):
+    # Editor swap/backup files and bytecode caches should not trigger reruns
+    return (
+        not name
+        or name.startswith((".", "#", "__pycache__"))
+        or name.endswith(("~", ".swp", ".swx", ".tmp"))
+    )
+
+
+def stop_process_group(process):
+    import signal
+    import subprocess
+
+    if process is None or process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=2)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+
+def watch_and_run(script_path, cflags=()):
+    import select
+    import subprocess
+
+    if not os.path.isfile(script_path):
+        print(f"❌ File not found: {script_path}")
+        return 1
+    directory = os.path.dirname(os.path.abspath(script_path))
+    try:
+        fd = inotify_open(directory)
+    except (OSError, AttributeError) as e:
+        print(f"❌ inotify is not available: {e}")
+        return 1
+
+    process = None
+    started = 0.0
+    print(f"👀 Watching {directory} (Ctrl-C to stop)")
+    try:
+        while True:
+            command = script_command(script_path, cflags) if os.path.isfile(script_path) else None
+            if command is not None:
+                label, argv = command
+                print(label)
+                started = time.perf_counter()
+                # Own process group, so a rerun can stop the script and its children
+                process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, start_new_session=True)
+
+            while True:
+                # Only poll while a run is in flight; idle waiting blocks on inotify
+                timeout = 0.1 if process is not None and process.returncode is None else None
+                readable, _, _ = select.select([fd], [], [], timeout)
+                if process is not None and process.returncode is None and process.poll() is not None:
+                    status = "✅" if process.returncode == 0 else "❌"
+                    print(
+                        f"{status} Exited with {process.returncode} in {time.perf_counter() - started:.2f}s"
+                        " — waiting for changes..."
+                    )
+                if readable and not all(map(is_watch_noise, read_inotify_names(fd))):
+                    break
+
+            # Debounce: editors often write a file in several steps
+            while select.select([fd], [], [], WATCH_DEBOUNCE)[0]:
+                read_inotify_names(fd)
+            print("\n🔁 Change detected; re-running.")
+            if process is not None and process.returncode is None:
+                print("⏹️ Stopping the current run.")
+                stop_process_group(process)
+    except KeyboardInterrupt:
+        stop_process_group(process)
+        print("\n⏹️ Stopped watching.")
+        return 0
+    finally:
+        os.close(fd)
+
+
+def parse_size(text):
+    units = {"k": 1024, "m": 1024**2, "g": 1024**3}
+    text = text.strip().lower().rstrip("b")
+    if text and text[-1] in units:
+        size = int(text[:-1]) * units[text[-1]]
+    else:
+        size = int(text)
+    if size <= 0:
+        raise ValueError(f"invalid size: {text}")
+    return size
+
+
+def format_size(num_bytes):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+def show_hash_progress(done, total, start):
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    speed = done / elapsed / (1024 * 1024)
+    percent = done * 100 / total if total else 100
+    sys.stderr.write(
+        f"\r⏳ {percent:5.1f}%  {format_size(done)} / {format_size(total)}  {speed:.1f} MB/s"
+    )
+    sys.stderr.flush()
+
+
+def new_hash(hash_type):
+    import hashlib
+
+    return getattr(hashlib, hash_type)()
+
+
+def parse_hash_types(text):
+    text = text.lower()
+    if text == "all":
+        return list(HASH_TYPES)
+    hash_types = []
+    for name in text.split(","):
+        name = name.strip()
+        if name not in HASH_TYPES:
+            raise ValueError(name)
+        if name not in hash_types:
+            hash_types.append(name)
+    return hash_types
+
+
+def hash_file(
+    file_path, hash_types, buffer_size=HASH_BUFFER_SIZE, use_mmap=False, report=True
+):
+    # Every selected algorithm is fed from the same buffer, so the file is read once
+    hashers = {hash_type: new_hash(hash_type) for hash_type in hash_types}
+    updates = [hash_obj.update for hash_obj in hashers.values()]
+    total = os.path.getsize(file_path)
+    large = total >= HASH_PROGRESS_MIN_SIZE
+    show_progress = large and report and sys.stderr.isatty()
+    start = time.perf_counter()
+    last_report = start
+    done = 0
+    dropped = 0
+
+    with open(file_path, "rb", buffering=0) as f:
+        fd = f.fileno()
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        if use_mmap and total > 0:
+            import mmap
+
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, "madvise"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mm) as view:
+                    while done < total:
+                        with view[done : done + buffer_size] as chunk:
+                            for update in updates:
+                                update(chunk)
+                        done = min(done + buffer_size, total)
+                        if show_progress and time.perf_counter() - last_report > 0.5:
+                            last_report = time.perf_counter()
+                            show_hash_progress(done, total, start)
         else:
-            print("❌ Unknown script type. Please specify manually.")
+            buf = bytearray(buffer_size)
+            with memoryview(buf) as view:
+                while True:
+                    n = f.readinto(buf)
+                    if not n:
+                        break
+                    with view[:n] as chunk:
+                        for update in updates:
+                            update(chunk)
+                    done += n
 
+                    # Don't let a multi-GB file evict everything else from page cache
+                    if large and done - dropped >= HASH_DROP_CACHE_STEP:
+                        if hasattr(os, "posix_fadvise"):
+                            os.posix_fadvise(
+                                fd, dropped, done - dropped, os.POSIX_FADV_DONTNEED
+                            )
+                        dropped = done
+                    if show_progress and time.perf_counter() - last_report > 0.5:
+                        last_report = time.perf_counter()
+                        show_hash_progress(done, total, start)
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: alltool <command> [args]")
+    if large and report:
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        if show_progress:
+            show_hash_progress(done, total, start)
+            sys.stderr.write("\n")
         print(
-            "Available commands: create, format, refresh, help, netspeed, sound, video, downloadvs, requirement, power, sf, sif, up, run, psg, hs, sr, wea, pr"
+            f"📊 Read {format_size(done)} in {elapsed:.1f}s ({done / elapsed / (1024 * 1024):.1f} MB/s)"
         )
-        return
+    return hashers
 
-    command = sys.argv[1]
 
-    if command == "create":
-        if len(sys.argv) < 3:
-            print("Usage: alltool create <filename>")
-            return
-        filepath = sys.argv[2]
-        folder = os.path.dirname(filepath)
-        if folder and not os.path.exists(folder):
-            os.makedirs(folder)
-        subprocess.run(["touch", filepath])
-
-    elif command == "format":
-        if len(sys.argv) < 4:
-            print("Usage: alltool format <disk> <type>")
-            return
-        disk = sys.argv[2]
-        fs_type = sys.argv[3].lower()
+def walk_files(root):
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"⚠️ Skipping {current}: {e}", file=sys.stderr)
 
-        formatters = {"ntfs": "mkfs.ntfs", "ext4": "mkfs.ext4", "vfat": "mkfs.vfat"}
 
-        if fs_type not in formatters:
-            print(f"Unsupported format type: {fs_type}")
-            print(f"Supported types: {', '.join(formatters.keys())}")
-            return
+def hash_worker(job):
+    file_path, hash_types, buffer_size = job
+    try:
+        hashers = hash_file(file_path, hash_types, buffer_size=buffer_size, report=False)
+        size = os.path.getsize(file_path)
+    except OSError as e:
+        return file_path, None, 0, str(e)
+    digests = {hash_type: h.hexdigest() for hash_type, h in hashers.items()}
+    return file_path, digests, size, None
+
+
+def manifest_line(file_path, digests):
+    # Same escaping as coreutils for names with backslashes or newlines
+    prefix = ""
+    if "\\" in file_path or "\n" in file_path:
+        prefix = "\\"
+        file_path = file_path.replace("\\", "\\\\").replace("\n", "\\n")
+    if len(digests) == 1:
+        return f"{prefix}{next(iter(digests.values()))}  {file_path}"
+    # Several algorithms: BSD tag format, as printed by sha256sum --tag
+    return "\n".join(
+        f"{prefix}{hash_type.upper()} ({file_path}) = {digest}"
+        for hash_type, digest in digests.items()
+    )
+
+
+def hash_tree(
+    root, hash_types, out, buffer_size=HASH_BUFFER_SIZE, workers=None, cache=None
+):
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    # Sorted input + executor.map keeps the manifest order stable while streaming
+    plan = []
+    misses = []
+    for entry in sorted(walk_files(root), key=lambda entry: entry.path):
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            st = None
+        digests = cache.lookup(st, hash_types) if cache and st else None
+        plan.append((entry.path, st, digests))
+        if digests is None:
+            misses.append(entry.path)
+
+    chunksize = max(1, min(256, len(misses) // (workers * 4)))
+    jobs = ((path, hash_types, buffer_size) for path in misses)
+    hashed = failed = total_bytes = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(hash_worker, jobs, chunksize=chunksize) if misses else None
+        for file_path, st, digests in plan:
+            if digests is None:
+                _, digests, size, error = next(results)
+                if error:
+                    failed += 1
+                    print(f"❌ {file_path}: {error}", file=sys.stderr)
+                    continue
+                if cache and st:
+                    cache.store(st, digests)
+                total_bytes += size
+            out.write(manifest_line(file_path, digests) + "\n")
+            hashed += 1
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    return hashed, failed, total_bytes, elapsed
 
-        print(f"⚠️ Warning: Make sure '{disk}' is a valid device like /dev/sdb1")
-        confirm = input(
-            f"Are you sure you want to format {disk} as {fs_type}? This will erase all data! (yes/no): "
+
+class HashCache:
+    def __init__(self, path=HASH_CACHE_PATH, max_entries=HASH_CACHE_MAX_ENTRIES):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS hashes (
+                dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,
+                algo TEXT, digest TEXT, last_used REAL,
+                PRIMARY KEY (dev, ino, size, mtime_ns, algo)
+            ) WITHOUT ROWID"""
         )
-        if confirm.lower() != "yes":
-            print("Aborted.")
-            return
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes (last_used)"
+        )
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.touched = []
+        self.pending = []
 
-        print(f"Formatting {disk} as {fs_type}...")
-        subprocess.run(["sudo", formatters[fs_type], disk])
-    elif command == "refresh":
-        print("🔄 Refreshing alltool setup...")
+    @staticmethod
+    def key(st):
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
 
-        # Make script executable
-        script_path = os.path.expanduser("~/bin/AllTools.py")
-        subprocess.run(["chmod", "+x", script_path])
+    def lookup(self, st, hash_types):
+        key = self.key(st)
+        rows = dict(
+            self.db.execute(
+                "SELECT algo, digest FROM hashes WHERE dev=? AND ino=? AND size=? AND mtime_ns=?",
+                key,
+            )
+        )
+        if all(hash_type in rows for hash_type in hash_types):
+            self.hits += 1
+            self.touched.extend(key + (hash_type,) for hash_type in hash_types)
+            return {hash_type: rows[hash_type] for hash_type in hash_types}
+        self.misses += 1
+        return None
 
-        # Detect shell config file
-        shell = os.environ.get("SHELL", "")
-        if "zsh" in shell:
-            config_file = os.path.expanduser("~/.zshrc")
-        elif "bash" in shell:
-            config_file = os.path.expanduser("~/.bashrc")
-        else:
-            config_file = os.path.expanduser("~/.profile")
+    def store(self, st, digests):
+        key = self.key(st)
+        self.pending.extend(key + (hash_type, d) for hash_type, d in digests.items())
 
-        # Check if PATH is already set
-        path_line = 'export PATH="$HOME/bin:$PATH"'
-        already_set = False
-        if os.path.exists(config_file):
-            with open(config_file, "r") as f:
-                for line in f:
-                    if path_line in line:
-                        already_set = True
-                        break
+    def close(self):
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "UPDATE hashes SET last_used=? WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND algo=?",
+                ((now,) + key for key in self.touched),
+            )
+            if self.pending:
+                # A changed file gets a new key, so drop the digests of its old contents
+                self.db.executemany(
+                    "DELETE FROM hashes WHERE dev=? AND ino=? AND (size!=? OR mtime_ns!=?)",
+                    {row[:4] for row in self.pending},
+                )
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (row + (now,) for row in self.pending),
+                )
+                count = self.db.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+                if count > self.max_entries:
+                    # Evict least recently used entries down to 90% of the limit
+                    evict = count - int(self.max_entries * 0.9)
+                    self.db.execute(
+                        "DELETE FROM hashes WHERE (dev, ino, size, mtime_ns, algo) IN "
+                        "(SELECT dev, ino, size, mtime_ns, algo FROM hashes ORDER BY last_used LIMIT ?)",
+                        (evict,),
+                    )
+        self.db.close()
 
-        # Append if missing
-        if not already_set:
-            with open(config_file, "a") as f:
-                f.write(f"\n# Added by alltool\n{path_line}\n")
-            print(f"✅ PATH updated in {config_file}")
-        else:
-            print(f"ℹ️ PATH already set in {config_file}")
+    def summary(self):
+        return f"💾 Hash cache: {self.hits} hits, {self.misses} misses"
 
-        print("Please run: source ~/.zshrc or restart your terminal to apply changes.")
-        print("Refresh complete.")
 
-    elif command == "help":
-        lang = sys.argv[2] if len(sys.argv) > 2 else "en"
+def open_hash_cache():
+    try:
+        return HashCache()
+    except Exception as e:
+        print(f"⚠️ Hash cache disabled: {e}", file=sys.stderr)
+        return None
 
-        help_texts = {
-            "en": """
-Usage: alltool <command> [args]
-Available commands:
-  create <filename>         Create a file, auto-create folders if needed
-  format <disk> <type>     Format disk (types: ntfs, ext4, vfat)
-  refresh                  Refresh permissions and show PATH setup
-  help [lang]             Show help in en, fr, ar, de
-  sound <file|playlist.txt> Play audio file or playlist (wav, mp3, ogg, flac, aac, m4a)
-  netspeed                Test internet connection speed
-  video <path>           Play video files
-  downloadvs <url>       Download video or audio from supported websites
-  power                  Manage power profiles and system control
-    - pws: power-saver mode    - pwn: balanced mode      - pwp: performance mode
-    - pwst: power status       - pwo: shutdown           - pwr: reboot
-    - pwl: logout             - pwsu: suspend           - pwh: hibernate
-    - pwlo: lock screen
-  requirement            Check if alltool dependencies are installed
-  sf                    Show files in current directory
-  sif                   Show detailed system information
-  up                    Check for system updates
-  run <script>          Auto-detect and run scripts (py, sh, js, pl, rb, php, jar, cpp)
-  psg <length> [options] Generate secure password
-    Options: nose (no lowercase), nos (no uppercase), not (no digits), nol (no special)
-  hs <file> <type>      Calculate file hash (md5, sha1, sha256, sha512, blake2b, blake2s)
-  sr <topic>            Search the web for information using AI
-  wea <city>            Get weather information for a city
-  pr                   Manage poromodor sessions
-   - needed sessions
-   - stop : Stop running Pomodoro timer
+
+def manifest_type_from_name(manifest_path):
+    # SHA512SUMS, B2SUMS, files.sha256, ... -> hash type, or None
+    import re
+
+    names = {"b2": "blake2b", "md5": "md5", "sha1": "sha1", "sha256": "sha256", "sha512": "sha512"}
+    names.update((name, name) for name in ("blake2b", "blake2s"))
+    for token in re.split(r"[^a-z0-9]+", os.path.basename(manifest_path).lower()):
+        token = token.removesuffix("sums").removesuffix("sum")
+        if token in names:
+            return names[token]
+    return None
+
+
+def parse_manifest(manifest_path, default_type=None):
+    import re
+
+    # 128 hex digits may be SHA-512 or BLAKE2b (b2sum), so that length is never
+    # guessed; it needs --type or a telling file name such as B2SUMS
+    digest_types = {32: "md5", 40: "sha1", 64: "sha256"}
+    name_type = manifest_type_from_name(manifest_path)
+    gnu_line = re.compile(r"^([0-9a-fA-F]+) [ *](.+)$")
+    bsd_line = re.compile(r"^([A-Za-z0-9]+)(?:-\d+)? \((.+)\) = ([0-9a-fA-F]+)$")
+    entries = []
+    with open(manifest_path, "r", encoding="utf-8", errors="surrogateescape") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            escaped = line.startswith("\\")
+            if escaped:
+                line = line[1:]
+            match = bsd_line.match(line)
+            if match:
+                hash_type = match.group(1).lower()
+                file_path, digest = match.group(2), match.group(3)
+            else:
+                match = gnu_line.match(line)
+                if not match:
+                    print(f"⚠️ {manifest_path}:{line_no}: improperly formatted line")
+                    continue
+                digest, file_path = match.group(1), match.group(2)
+                hash_type = default_type or name_type or digest_types.get(len(digest))
+            if hash_type not in HASH_TYPES:
+                print(f"⚠️ {manifest_path}:{line_no}: unknown hash type, use --type")
+                continue
+            if escaped:
+                file_path = re.sub(
+                    r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), file_path
+                )
+            entries.append((file_path, hash_type, digest.lower()))
+    return entries
+
+
+def check_manifest(entries, workers=None, quiet=False):
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    workers = workers or os.cpu_count() or 1
+    expected = {}
+    ok = mismatched = unreadable = total_bytes = 0
+    start = time.perf_counter()
+    pending = set()
+    jobs = iter(entries)
+
+    # Keep a bounded window of in-flight files and report each as soon as it finishes
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            for file_path, hash_type, digest in jobs:
+                future = executor.submit(
+                    hash_worker, (file_path, [hash_type], HASH_BUFFER_SIZE)
+                )
+                expected[future] = (hash_type, digest)
+                pending.add(future)
+                if len(pending) >= workers * 4:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                hash_type, digest = expected.pop(future)
+                file_path, digests, size, error = future.result()
+                if error:
+                    unreadable += 1
+                    print(f"{file_path}: FAILED open or read ({error})", flush=True)
+                elif digests[hash_type] == digest:
+                    ok += 1
+                    total_bytes += size
+                    if not quiet:
+                        print(f"{file_path}: OK", flush=True)
+                else:
+                    mismatched += 1
+                    total_bytes += size
+                    print(f"{file_path}: FAILED", flush=True)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    return ok, mismatched, unreadable, total_bytes, elapsed
+
+
+def sample_hash_worker(job):
+    file_path, hash_type = job
+    try:
+        with open(file_path, "rb") as f:
+            hash_obj = new_hash(hash_type)
+            hash_obj.update(f.read(DUP_SAMPLE_SIZE))
+            size = os.fstat(f.fileno()).st_size
+            if size > DUP_SAMPLE_SIZE:
+                f.seek(max(DUP_SAMPLE_SIZE, size - DUP_SAMPLE_SIZE))
+                hash_obj.update(f.read(DUP_SAMPLE_SIZE))
+    except OSError as e:
+        return file_path, None, str(e)
+    return file_path, hash_obj.hexdigest(), None
+
+
+def find_duplicates(roots, hash_type, workers=None, cache=None):
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+
+    # Stage 1: group by size, only size collisions can be duplicates
+    by_size = {}
+    seen_inodes = set()
+    stats = {}
+    for root in roots:
+        for entry in walk_files(root):
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            inode = (st.st_dev, st.st_ino)
+            if st.st_size == 0 or inode in seen_inodes:  # skip empty files and hardlinks
+                continue
+            seen_inodes.add(inode)
+            stats[entry.path] = st
+            by_size.setdefault(st.st_size, []).append(entry.path)
+    candidates = [paths for paths in by_size.values() if len(paths) > 1]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Stage 2: hash the first and last 64 KB of every size collision
+        paths = [path for group in candidates for path in group]
+        chunksize = max(1, min(256, len(paths) // (workers * 4)))
+        samples = {}
+        for path, digest, error in executor.map(
+            sample_hash_worker, ((p, hash_type) for p in paths), chunksize=chunksize
+        ):
+            if error:
+                print(f"⚠️ Skipping {path}: {error}", file=sys.stderr)
+                continue
+            size = stats[path].st_size
+            samples.setdefault((size, digest), []).append(path)
+
+        # Stage 3: full hash only the survivors (small files were read whole already)
+        groups = {}
+        full_jobs = []
+        for (size, digest), group in samples.items():
+            if len(group) < 2:
+                continue
+            if size <= 2 * DUP_SAMPLE_SIZE:
+                groups[(size, digest)] = group
+                continue
+            for path in group:
+                cached = cache.lookup(stats[path], [hash_type]) if cache else None
+                if cached:
+                    groups.setdefault((size, cached[hash_type]), []).append(path)
+                else:
+                    full_jobs.append(path)
+
+        chunksize = max(1, min(64, len(full_jobs) // (workers * 4)))
+        jobs = ((path, [hash_type], HASH_BUFFER_SIZE) for path in full_jobs)
+        for path, digests, size, error in executor.map(
+            hash_worker, jobs, chunksize=chunksize
+        ):
+            if error:
+                print(f"⚠️ Skipping {path}: {error}", file=sys.stderr)
+                continue
+            if cache:
+                cache.store(stats[path], digests)
+            groups.setdefault((size, digests[hash_type]), []).append(path)
+
+    duplicates = [
+        (size, sorted(group)) for (size, _), group in groups.items() if len(group) > 1
+    ]
+    duplicates.sort(key=lambda item: (-item[0] * (len(item[1]) - 1), item[1]))
+    return duplicates, len(stats)
+
+
+def pop_flag(args, name):
+    if name in args:
+        args.remove(name)
+        return True
+    return False
+
+
+def pop_option(args, name, default=None):
+    if name not in args:
+        return default
+    i = args.index(name)
+    if i + 1 >= len(args):
+        raise ValueError(f"{name} needs a value")
+    value = args[i + 1]
+    del args[i : i + 2]
+    return value
+
+
+def pop_workers(args, name, default=0):
+    # A worker count must be a whole number >= 1; the default (0 = automatic) is not checked
+    value = pop_option(args, name)
+    if value is None:
+        return default
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(f"{name} must be at least 1")
+    return workers
+
+
+def import_requests():
+    try:
+        import requests
+    except ImportError:
+        print("❌ The 'requests' package is not installed.")
+        print("💡 Install it with: pip install requests")
+        return None
+    return requests
+
+
+def http_session():
+    # One pooled session per process: batch queries, and repeated commands in the
+    # interactive shell, reuse keep-alive connections instead of new TLS handshakes.
+    # Daemon workers are forked per command and exit, so they start with a fresh one.
+    global _http_session
+    if _http_session is None:
+        requests = import_requests()
+        if requests is None:
+            return None
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = USER_AGENT
+        _http_session = session
+    return _http_session
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    def __init__(self, path=SEARCH_CACHE_PATH, max_entries=SEARCH_CACHE_MAX_ENTRIES):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS searches (
+                query TEXT PRIMARY KEY, results TEXT, fetched_at REAL, last_used REAL
+            )"""
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS searches_last_used ON searches (last_used)"
+        )
+        self.max_entries = max_entries
+
+    def lookup(self, query, ttl=None):
+        import json
+
+        row = self.db.execute(
+            "SELECT results, fetched_at FROM searches WHERE query=?",
+            (normalize_query(query),),
+        ).fetchone()
+        if row is None or (ttl is not None and time.time() - row[1] > ttl):
+            return None
+        with self.db:
+            self.db.execute(
+                "UPDATE searches SET last_used=? WHERE query=?",
+                (time.time(), normalize_query(query)),
+            )
+        return json.loads(row[0]), row[1]
+
+    def store(self, query, results):
+        import json
+
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)",
+                (normalize_query(query), json.dumps(results), now, now),
+            )
+            count = self.db.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+            if count > self.max_entries:
+                # Evict least recently used entries down to 90% of the limit
+                evict = count - int(self.max_entries * 0.9)
+                self.db.execute(
+                    "DELETE FROM searches WHERE query IN "
+                    "(SELECT query FROM searches ORDER BY last_used LIMIT ?)",
+                    (evict,),
+                )
+
+    def close(self):
+        self.db.close()
+
+
+def open_search_cache():
+    try:
+        return SearchCache()
+    except Exception as e:
+        print(f"⚠️ Search cache disabled: {e}", file=sys.stderr)
+        return None
+
+
+def make_result_extractor(limit=5):
+    from html.parser import HTMLParser
+
+    class ResultExtractor(HTMLParser):
+        # Collects result__a (title + url) / result__snippet pairs and sets
+        # done once `limit` results are in, so the caller can stop reading.
+        def __init__(self):
+            super().__init__()
+            self.results = []
+            self.done = False
+            self.current = None  # result being built
+            self.capture = None  # "title" or "snippet" while inside that link
+            self.text = []
+
+        def handle_starttag(self, tag, attrs):
+            if tag != "a" or self.done:
+                return
+            classes = (dict(attrs).get("class") or "").split()
+            if "result__a" in classes:
+                self.current = {"title": "", "url": dict(attrs).get("href"), "snippet": ""}
+                self.capture, self.text = "title", []
+            elif "result__snippet" in classes and self.current is not None:
+                self.capture, self.text = "snippet", []
+
+        def handle_endtag(self, tag):
+            if tag != "a" or self.capture is None:
+                return
+            self.current[self.capture] = "".join(self.text).strip()
+            if self.capture == "snippet":
+                self.results.append(self.current)
+                self.current = None
+                self.done = len(self.results) >= limit
+            self.capture = None
+
+        def handle_data(self, data):
+            if self.capture is not None:
+                self.text.append(data)
+
+    return ResultExtractor()
+
+
+def extract_results_bs4(html, limit=5):
+    # Previous BeautifulSoup-based extraction, kept for sr --bench-parse
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    results = []
+    for result in soup.find_all("div", class_="result__body"):
+        title = result.find("a", class_="result__a")
+        snippet = result.find("a", class_="result__snippet")
+        if title and snippet:
+            results.append(
+                {
+                    "title": title.text.strip(),
+                    "url": title.get("href"),
+                    "snippet": snippet.text.strip(),
+                }
+            )
+            if len(results) >= limit:
+                break
+    return results
+
+
+def search_url():
+    # Read per call: the daemon keeps the module loaded across client environments
+    return os.environ.get("ALLTOOL_SEARCH_URL", SEARCH_URL)
+
+
+def search_cache_ttl():
+    return int(os.environ.get("ALLTOOL_SEARCH_TTL", SEARCH_CACHE_TTL))
+
+
+def search_web(session, topic, limit=5):
+    # Returns [{"title", "url", "snippet"}]; network errors propagate to the caller
+    import codecs
+
+    with session.get(
+        search_url(), params={"q": topic, "kl": "us-en"}, timeout=10, stream=True
+    ) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        parser = make_result_extractor(limit)
+        # Parse while downloading and stop parsing once enough results are in
+        chunks = response.iter_content(SEARCH_CHUNK_SIZE)
+        for chunk in chunks:
+            parser.feed(decoder.decode(chunk))
+            if parser.done:
+                break
+        # Read (without parsing) the rest of the body, so the connection goes back to
+        # the pool instead of being closed; give up on unexpectedly large bodies
+        drained = 0
+        for chunk in chunks:
+            drained += len(chunk)
+            if drained > SEARCH_DRAIN_LIMIT:
+                break
+    return parser.results
+
+
+def bench_parse(paths, runs=20, limit=5):
+    import tracemalloc
+
+    def stdlib_extract(html):
+        parser = make_result_extractor(limit)
+        for i in range(0, len(html), SEARCH_CHUNK_SIZE):
+            parser.feed(html[i : i + SEARCH_CHUNK_SIZE])
+            if parser.done:
+                break
+        return parser.results
+
+    parsers = {"html.parser stream": stdlib_extract}
+    try:
+        import bs4  # noqa: F401
+
+        parsers["BeautifulSoup"] = lambda html: extract_results_bs4(html, limit)
+    except ImportError:
+        print("⚠️ beautifulsoup4 is not installed; benchmarking the stdlib extractor only.")
+
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        print(f"📄 {path} ({format_size(len(html.encode()))}, {runs} runs)")
+        print(f"   {'parser':<20} {'results':>7} {'mean ms':>9} {'min ms':>9} {'peak mem':>10}")
+        for name, extract in parsers.items():
+            times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                results = extract(html)
+                times.append((time.perf_counter() - start) * 1000)
+            # Peak memory is measured on a separate run; tracing slows parsing down
+            tracemalloc.start()
+            extract(html)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                f"   {name:<20} {len(results):>7} {sum(times) / runs:>9.2f} {min(times):>9.2f} {format_size(peak):>10}"
+            )
+
+
+class HostRateLimiter:
+    # Spaces out requests to the same host; threads block in wait() until their slot
+    def __init__(self, per_second):
+        import threading
+
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, url):
+        from urllib.parse import urlsplit
+
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def batch_search(queries, workers=8, rate=2.0, offline=False, refresh=False):
+    # Streams one JSON object per query as soon as it completes
+    import json
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    def emit(query, results=None, cached=False, error=None):
+        record = {"query": query, "cached": cached, "results": results}
+        if error:
+            record["error"] = error
+        print(json.dumps(record, ensure_ascii=False), flush=True)
+
+    cache = open_search_cache()
+    pending = []
+    # Cache lookups stay on this thread (sqlite connections are per-thread)
+    for query in dict.fromkeys(queries):
+        cached = None
+        if cache and not refresh:
+            cached = cache.lookup(query, ttl=None if offline else search_cache_ttl())
+        if cached is not None:
+            emit(query, cached[0], cached=True)
+        elif offline:
+            emit(query, error="not cached (offline mode)")
+        else:
+            pending.append(query)
+
+    failed = 0
+    if pending:
+        session = http_session()
+        if session is None:
+            return 1
+        limiter = HostRateLimiter(rate)
+
+        def fetch(query):
+            limiter.wait(search_url())
+            return search_web(session, query)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch, query): query for query in pending}
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    failed += 1
+                    emit(query, error=str(e))
+                    continue
+                # An empty page may be a captcha/anomaly page; don't cache it for a day
+                if cache and results:
+                    cache.store(query, results)
+                emit(query, results)
+    if cache:
+        cache.close()
+    return 1 if failed else 0
+
+
+def fetch_weather(session, city):
+    from urllib.parse import quote
+
+    response = session.get(
+        # Read per call: the daemon keeps the module loaded across client environments
+        os.environ.get("ALLTOOL_WEATHER_URL", WEATHER_URL).rstrip("/") + "/" + quote(city),
+        params={"format": "2"},
+        timeout=8,
+    )
+    response.raise_for_status()
+    # wttr.in always answers in UTF-8; don't let requests guess from the bytes
+    return response.content.decode("utf-8", errors="replace").strip()
+
+
+def load_weather_cache():
+    import json
+
+    try:
+        with open(WEATHER_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_weather_cache(entries):
+    import fcntl
+    import json
+
+    os.makedirs(os.path.dirname(WEATHER_CACHE_FILE), exist_ok=True)
+    # Merge under a lock: background refreshers and foreground calls may overlap
+    with open(WEATHER_CACHE_FILE + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        cache = load_weather_cache()
+        cache.update(entries)
+        tmp_path = f"{WEATHER_CACHE_FILE}.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, WEATHER_CACHE_FILE)
+
+
+def fetch_weather_many(cities):
+    # Returns ({city: text}, {city: error}); all cities share one pooled session
+    from concurrent.futures import ThreadPoolExecutor
+
+    session = http_session()
+    if session is None:
+        return {}, {city: "requests is not installed" for city in cities}
+
+    def fetch(city):
+        try:
+            return city, fetch_weather(session, city), None
+        except Exception as e:
+            return city, None, str(e)
+
+    fetched, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=min(8, len(cities))) as executor:
+        for city, text, error in executor.map(fetch, cities):
+            if error:
+                errors[city] = error
+            else:
+                fetched[city] = text
+    now = time.time()
+    if fetched:
+        update_weather_cache(
+            {city.lower(): {"text": text, "fetched_at": now} for city, text in fetched.items()}
+        )
+    return fetched, errors
+
+
+def refresh_weather_in_background(cities):
+    import subprocess
+
+    env = dict(os.environ, ALLTOOL_NO_DAEMON="1")
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "wea", "--refresh", ",".join(cities)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        env=env,
+    )
+
+
+class DownloadQueue:
+    def __init__(self, path=DOWNLOAD_DB_PATH):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS queue (
+                id INTEGER PRIMARY KEY, url TEXT UNIQUE, directory TEXT,
+                status TEXT, attempts INTEGER DEFAULT 0, next_try REAL DEFAULT 0,
+                added_at REAL, started_at REAL, finished_at REAL,
+                output TEXT, bytes INTEGER, error TEXT, force INTEGER DEFAULT 0
+            )"""
+        )
+        # Queues created before --force existed lack the column
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(queue)")}
+        if "force" not in columns:
+            self.db.execute("ALTER TABLE queue ADD COLUMN force INTEGER DEFAULT 0")
+        self.db.execute("CREATE INDEX IF NOT EXISTS queue_status ON queue (status, next_try)")
+
+    def add(self, urls, directory, force=False):
+        added = 0
+        with self.db:
+            for url in urls:
+                # Finished or failed URLs are queued again from scratch; ones still
+                # queued or running are left alone
+                cursor = self.db.execute(
+                    "INSERT INTO queue (url, directory, status, added_at, force) VALUES (?, ?, 'queued', ?, ?) "
+                    "ON CONFLICT (url) DO UPDATE SET directory=excluded.directory, status='queued', "
+                    "attempts=0, next_try=0, added_at=excluded.added_at, started_at=NULL, "
+                    "finished_at=NULL, error=NULL, force=excluded.force WHERE status IN ('done', 'failed')",
+                    (url, directory, time.time(), int(force)),
+                )
+                added += cursor.rowcount
+        return added
+
+    def recover(self):
+        # Items left "running" by a crashed or interrupted runner go back in line;
+        # yt-dlp --continue picks up their .part files
+        with self.db:
+            return self.db.execute(
+                "UPDATE queue SET status='queued' WHERE status='running'"
+            ).rowcount
+
+    def claim(self, limit):
+        rows = self.db.execute(
+            "SELECT id, url, directory, attempts, force FROM queue WHERE status='queued' AND next_try<=? "
+            "ORDER BY id LIMIT ?",
+            (time.time(), limit),
+        ).fetchall()
+        with self.db:
+            self.db.executemany(
+                "UPDATE queue SET status='running', started_at=? WHERE id=?",
+                ((time.time(), row[0]) for row in rows),
+            )
+        return rows
+
+    def next_retry(self):
+        return self.db.execute(
+            "SELECT MIN(next_try) FROM queue WHERE status='queued'"
+        ).fetchone()[0]
+
+    def finish(self, item_id, output, size):
+        with self.db:
+            self.db.execute(
+                "UPDATE queue SET status='done', finished_at=?, output=?, bytes=?, error=NULL WHERE id=?",
+                (time.time(), output, size, item_id),
+            )
+
+    def fail(self, item_id, attempts, error, max_attempts):
+        if attempts < max_attempts:
+            # Exponential backoff: 10s, 20s, 40s ... capped at 10 minutes
+            status, next_try = "queued", time.time() + min(600, 5 * 2**attempts)
+        else:
+            status, next_try = "failed", 0
+        with self.db:
+            self.db.execute(
+                "UPDATE queue SET status=?, attempts=?, next_try=?, finished_at=?, error=? WHERE id=?",
+                (status, attempts, next_try, time.time(), error, item_id),
+            )
+        return status
+
+    def counts(self):
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM queue GROUP BY status"))
+
+    def recent(self, limit=20):
+        return self.db.execute(
+            "SELECT id, url, status, attempts, started_at, finished_at, bytes, error "
+            "FROM queue ORDER BY id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def close(self):
+        self.db.close()
+
+
+class DownloadArchive:
+    # Completed downloads, looked up by URL or (extractor, id) through indexes so
+    # duplicates are skipped before yt-dlp or the network is involved
+    def __init__(self, path=DOWNLOAD_DB_PATH):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS archive (
+                extractor TEXT, video_id TEXT, url TEXT, output TEXT,
+                sha256 TEXT, bytes INTEGER, completed_at REAL,
+                PRIMARY KEY (extractor, video_id)
+            )"""
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS archive_url ON archive (url)")
+
+    def lookup(self, url):
+        normalized, video_key = archive_keys(url)
+        row = self.db.execute(
+            "SELECT output FROM archive WHERE url=? LIMIT 1", (normalized,)
+        ).fetchone()
+        if row is None and video_key is not None:
+            row = self.db.execute(
+                "SELECT output FROM archive WHERE extractor=? AND video_id=?", video_key
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, url, records):
+        normalized, _ = archive_keys(url)
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO archive VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (r["extractor"], r["id"], normalized, r["output"], r["sha256"], r["bytes"], time.time())
+                    for r in records
+                ),
+            )
+
+    def entries(self):
+        return self.db.execute(
+            "SELECT extractor, video_id, url, output, sha256, bytes, completed_at "
+            "FROM archive ORDER BY completed_at"
+        ).fetchall()
+
+    def prune(self, older_than=None):
+        # Drops entries whose file is gone (or that are older than `older_than` seconds)
+        doomed = []
+        for extractor, video_id, _, output, _, _, completed_at in self.entries():
+            too_old = older_than is not None and time.time() - completed_at > older_than
+            if too_old or not (output and os.path.exists(output)):
+                doomed.append((extractor, video_id))
+        with self.db:
+            self.db.executemany("DELETE FROM archive WHERE extractor=? AND video_id=?", doomed)
+        return len(doomed)
+
+    def close(self):
+        self.db.close()
+
+
+def archive_keys(url):
+    # Returns (normalized url, (extractor, id) or None). The id is derived from the
+    # URL alone for common sites, so a different URL form of the same video matches.
+    from urllib.parse import parse_qs, urlsplit
+
+    parts = urlsplit(url.strip())
+    normalized = f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}"
+    if parts.query:
+        normalized += f"?{parts.query}"
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m.", "music."):
+        host = host.removeprefix(prefix)
+    video_id = None
+    if host == "youtube.com" and parts.path == "/watch":
+        video_id = parse_qs(parts.query).get("v", [None])[0]
+    elif host == "youtube.com" and parts.path.startswith(("/shorts/", "/embed/", "/live/")):
+        video_id = parts.path.split("/")[2]
+    elif host == "youtu.be":
+        video_id = parts.path.lstrip("/").split("/")[0]
+    return normalized, ("youtube", video_id) if video_id else None
+
+
+def run_yt_dlp(url, directory=None, log=None, extra_args=()):
+    # Runs yt-dlp and returns (exit code, [{extractor, id, output}]) for each file
+    import subprocess
+    import tempfile
+
+    fd, info_path = tempfile.mkstemp(prefix="alltool-ytdlp-")
+    os.close(fd)
+    try:
+        # --print-to-file (unlike --print) keeps yt-dlp's normal progress output
+        result = subprocess.run(
+            [
+                "yt-dlp",
+                *extra_args,
+                "--print-to-file",
+                "after_move:%(extractor_key)s\t%(id)s\t%(filepath)s",
+                info_path,
+                "--",  # a URL starting with "-" must not be read as an option
+                url,
+            ],
+            cwd=directory,
+            stdin=subprocess.DEVNULL if log else None,
+            stdout=log,
+            stderr=log,
+        )
+        with open(info_path, encoding="utf-8", errors="replace") as f:
+            fields = [line.rstrip("\n").split("\t", 2) for line in f if line.count("\t") >= 2]
+    finally:
+        os.remove(info_path)
+    records = [
+        {"extractor": extractor.lower(), "id": video_id, "output": os.path.join(directory or os.getcwd(), path)}
+        for extractor, video_id, path in fields
+    ]
+    return result.returncode, records
+
+
+def hash_downloads(records):
+    for record in records:
+        if os.path.isfile(record["output"]):
+            record["bytes"] = os.path.getsize(record["output"])
+            record["sha256"] = hash_file(record["output"], ["sha256"], report=False)["sha256"].hexdigest()
+        else:
+            record["bytes"], record["sha256"] = 0, None
+    return records
+
+
+def download_item(item_id, url, directory):
+    os.makedirs(DOWNLOAD_LOG_DIR, exist_ok=True)
+    log_path = os.path.join(DOWNLOAD_LOG_DIR, f"{item_id}.log")
+    start = time.perf_counter()
+    with open(log_path, "ab") as log:
+        # --continue resumes partial files left by an interrupted run
+        returncode, records = run_yt_dlp(url, directory, log, ["--continue"])
+    elapsed = time.perf_counter() - start
+    if returncode != 0:
+        return [], elapsed, f"yt-dlp exited with {returncode} (log: {log_path})"
+    return hash_downloads(records), elapsed, None
+
+
+def run_download_queue(workers, max_attempts):
+    import fcntl
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    os.makedirs(os.path.dirname(DOWNLOAD_DB_PATH), exist_ok=True)
+    lock = open(DOWNLOAD_DB_PATH + ".lock", "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print("ℹ️ The download queue is already being processed.")
+        return 0
+
+    queue = DownloadQueue()
+    archive = DownloadArchive()
+    recovered = queue.recover()
+    if recovered:
+        print(f"♻️ Resuming {recovered} interrupted downloads")
+    # All database access stays on this thread; workers only run yt-dlp
+    running = {}
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            for item_id, url, directory, attempts, force in queue.claim(workers - len(running)):
+                archived = None if force else archive.lookup(url)
+                if archived is not None:
+                    queue.finish(item_id, archived, 0)
+                    print(f"⏭️ [{item_id}] Already downloaded: {archived}")
+                    continue
+                print(f"⬇️ [{item_id}] {url}")
+                future = executor.submit(download_item, item_id, url, directory)
+                running[future] = (item_id, url, attempts)
+            if not running:
+                next_try = queue.next_retry()
+                if next_try is None:
+                    break
+                time.sleep(max(0.0, next_try - time.time()))
+                continue
+            next_try = queue.next_retry()
+            timeout = max(0.0, next_try - time.time()) if next_try and len(running) < workers else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                item_id, url, attempts = running.pop(future)
+                try:
+                    records, elapsed, error = future.result()
+                except OSError as e:
+                    records, elapsed, error = [], 0.0, str(e)
+                if error is None:
+                    archive.record(url, records)
+                    size = sum(record["bytes"] for record in records)
+                    output = records[0]["output"] if records else None
+                    queue.finish(item_id, output, size)
+                    speed = size / elapsed / (1024 * 1024) if elapsed else 0
+                    print(f"✅ [{item_id}] {output} ({format_size(size)}, {elapsed:.1f}s, {speed:.2f} MB/s)")
+                elif queue.fail(item_id, attempts + 1, error, max_attempts) == "queued":
+                    print(f"🔁 [{item_id}] {error}; retrying (attempt {attempts + 2}/{max_attempts})")
+                else:
+                    failed += 1
+                    print(f"❌ [{item_id}] {error}; giving up")
+    counts = queue.counts()
+    queue.close()
+    archive.close()
+    lock.close()
+    print(f"📊 Queue: {counts.get('done', 0)} done, {counts.get('failed', 0)} failed")
+    return 1 if failed else 0
+
+
+def show_download_queue():
+    queue = DownloadQueue()
+    counts = queue.counts()
+    print(
+        "📊 Queue: "
+        + ", ".join(f"{counts.get(status, 0)} {status}" for status in ("queued", "running", "done", "failed"))
+    )
+    for item_id, url, status, attempts, started, finished, size, error in queue.recent():
+        line = f"  [{item_id}] {status:<8} {url}"
+        if status == "done" and started and finished:
+            elapsed = max(finished - started, 1e-9)
+            line += f"  {format_size(size or 0)} @ {(size or 0) / elapsed / (1024 * 1024):.2f} MB/s"
+        elif error:
+            line += f"  (attempts: {attempts}, {error})"
+        print(line)
+    queue.close()
+
+
+def collect_tracks(inputs, supported_formats):
+    # Expands files, directories and .txt/.m3u playlists into one validated list
+    tracks, skipped = [], 0
+
+    def add(path):
+        nonlocal skipped
+        if path.startswith(("http://", "https://")):
+            tracks.append(path)
+        elif not os.path.isfile(path):
+            print(f"⚠️ Skipping missing file: {path}")
+            skipped += 1
+        elif not path.lower().endswith(supported_formats):
+            print(f"⚠️ Skipping unsupported format: {path}")
+            skipped += 1
+        else:
+            # Absolute, since mpv resolves playlist entries against the playlist's folder
+            tracks.append(os.path.abspath(path))
+
+    for input_path in inputs:
+        input_path = os.path.expanduser(input_path)
+        if os.path.isdir(input_path):
+            found = sorted(
+                os.path.abspath(entry.path)
+                for entry in walk_files(input_path)
+                if entry.name.lower().endswith(supported_formats)
+            )
+            tracks.extend(found)
+        elif input_path.lower().endswith((".txt", ".m3u", ".m3u8")) and os.path.isfile(input_path):
+            base = os.path.dirname(input_path)
+            with open(input_path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue  # m3u directives (#EXTM3U, #EXTINF) and comments
+                    # Relative entries are relative to the playlist, as in m3u
+                    add(os.path.join(base, os.path.expanduser(line)))
+        else:
+            add(input_path)
+    return tracks, skipped
+
+
+class MediaLibrary:
+    def __init__(self, path=LIBRARY_DB_PATH):
+        import sqlite3
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS media (
+                path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, kind TEXT,
+                duration REAL, codec TEXT, width INTEGER, height INTEGER,
+                artist TEXT, album TEXT, title TEXT, genre TEXT
+            )"""
+        )
+        for field in ("artist", "album", "title", "genre", "codec"):
+            self.db.execute(
+                f"CREATE INDEX IF NOT EXISTS media_{field} ON media ({field} COLLATE NOCASE)"
+            )
+
+    def known(self, root):
+        # Every path under root sorts between "root/" and "root0" ("0" follows "/")
+        root = root.rstrip(os.sep)
+        rows = self.db.execute(
+            "SELECT path, size, mtime_ns FROM media WHERE path >= ? AND path < ?",
+            (root + os.sep, root + chr(ord(os.sep) + 1)),
+        )
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def store(self, rows):
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def remove(self, paths):
+        with self.db:
+            self.db.executemany("DELETE FROM media WHERE path=?", ((path,) for path in paths))
+
+    def query(self, text, kind=None):
+        # "artist:foo codec:h264 live" -> field substring matches AND bare words
+        # matched against path, title and artist
+        clauses, params = [], []
+        for term in text.split():
+            field, sep, value = term.partition(":")
+            if sep and field.lower() in MEDIA_QUERY_FIELDS:
+                clauses.append(f"{field.lower()} LIKE ?")
+                params.append(f"%{value}%")
+            else:
+                clauses.append("(path LIKE ? OR title LIKE ? OR artist LIKE ?)")
+                params.extend([f"%{term}%"] * 3)
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        clauses.append("kind IS NOT NULL")
+        where = " AND ".join(clauses)
+        return self.db.execute(
+            f"SELECT path, kind, duration, codec, artist, title FROM media WHERE {where} "
+            "ORDER BY artist, album, path",
+            params,
+        ).fetchall()
+
+    def close(self):
+        self.db.close()
+
+
+def probe_media(path):
+    import json
+    import subprocess
+
+    result = subprocess.run(
+        ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", path],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    if result.returncode != 0:
+        return None
+    try:
+        info = json.loads(result.stdout or b"{}")
+    except ValueError:
+        return None
+    media_format = info.get("format", {})
+    streams = info.get("streams", [])
+    # Cover art shows up as a video stream in audio files, so skip attached pictures
+    video = [
+        st for st in streams
+        if st.get("codec_type") == "video" and not st.get("disposition", {}).get("attached_pic")
+    ]
+    audio = [st for st in streams if st.get("codec_type") == "audio"]
+    main = (video or audio or [{}])[0]
+    tags = {key.lower(): value for key, value in media_format.get("tags", {}).items()}
+    try:
+        duration = float(media_format.get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+    return {
+        "kind": "video" if video else "audio",
+        "duration": duration,
+        "codec": main.get("codec_name"),
+        "width": main.get("width"),
+        "height": main.get("height"),
+        "artist": tags.get("artist") or tags.get("album_artist"),
+        "album": tags.get("album"),
+        "title": tags.get("title"),
+        "genre": tags.get("genre"),
+    }
+
+
+def scan_library(roots, workers):
+    from concurrent.futures import ThreadPoolExecutor
+
+    library = MediaLibrary()
+    probed = unchanged = removed = failed = 0
+    for root in roots:
+        root = os.path.abspath(os.path.expanduser(root))
+        if not os.path.isdir(root):
+            print(f"⚠️ Skipping {root}: not a directory")
+            continue
+        print(f"📚 Scanning {root}")
+        known = library.known(root)
+        changed = []
+        for entry in walk_files(root):
+            if not entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            # Only new or modified files (by size and mtime) are probed again
+            if known.pop(entry.path, None) == (st.st_size, st.st_mtime_ns):
+                unchanged += 1
+            else:
+                changed.append((entry.path, st.st_size, st.st_mtime_ns))
+
+        # ffprobe does the work in child processes, so threads are enough here;
+        # database writes stay on this thread in batches
+        rows = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            probes = executor.map(lambda job: probe_media(job[0]), changed)
+            for (path, size, mtime_ns), info in zip(changed, probes):
+                if info is None:
+                    # Kept with no kind, so unreadable files are not re-probed every scan
+                    failed += 1
+                    rows.append((path, size, mtime_ns) + (None,) * 9)
+                    continue
+                rows.append(
+                    (path, size, mtime_ns, info["kind"], info["duration"], info["codec"],
+                     info["width"], info["height"], info["artist"], info["album"],
+                     info["title"], info["genre"])
+                )
+                probed += 1
+                if len(rows) >= 500:
+                    library.store(rows)
+                    rows = []
+                    sys.stderr.write(f"\r⏳ {probed}/{len(changed)} probed")
+                    sys.stderr.flush()
+        library.store(rows)
+        if len(changed) >= 500:
+            sys.stderr.write("\n")
+        # Whatever is left in `known` was deleted from disk
+        library.remove(known)
+        removed += len(known)
+    library.close()
+    print(f"✅ {probed} probed, {unchanged} unchanged, {removed} removed, {failed} unreadable")
+
+
+def is_media_query(arg):
+    field, sep, _ = arg.partition(":")
+    return bool(sep) and field.lower() in MEDIA_QUERY_FIELDS and not os.path.exists(arg)
+
+
+def resolve_media_queries(args, kind):
+    # Replaces library queries (artist:foo, codec:h264, ...) with matching paths
+    if not any(is_media_query(arg) for arg in args):
+        return args
+    if not os.path.exists(LIBRARY_DB_PATH):
+        print("❌ No media library yet. Run: alltool lib scan <dir>")
+        return []
+    query = " ".join(arg for arg in args if is_media_query(arg))
+    library = MediaLibrary()
+    matches = [row[0] for row in library.query(query, kind)]
+    library.close()
+    print(f"🔎 {query}: {len(matches)} {kind} files")
+    if not matches:
+        print("❌ No matching files in the library.")
+    return [arg for arg in args if not is_media_query(arg)] + matches
+
+
+def report_startup_time(args, runs=5):
+    import subprocess
+
+    # Time a cold `alltool <args>` the same way the shell would run it, and
+    # break down the module imports with Python's own -X importtime output
+    # argv[0] is the installed launcher when there is one, so its cached bytecode counts
+    script = os.path.abspath(sys.argv[0])
+    quiet = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL}
+
+    def best_of(cmd):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, stderr=subprocess.DEVNULL, **quiet)
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000
+
+    python_ms = best_of([sys.executable, "-c", "pass"])
+    total_ms = best_of([sys.executable, script] + args)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", script] + args,
+        stderr=subprocess.PIPE,
+        text=True,
+        **quiet,
+    )
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if name.startswith("  "):
+            continue  # nested import, already counted by its parent
+        try:
+            imports.append((int(cumulative), name.strip()))
+        except ValueError:
+            continue  # header line
+
+    print(f"⏱️ Startup time for: alltool {' '.join(args) or '(no command)'}")
+    print(f"   Total:           {total_ms:7.1f} ms (best of {runs})")
+    print(f"   Python itself:   {python_ms:7.1f} ms")
+    print(f"   alltool:         {total_ms - python_ms:7.1f} ms")
+    print(f"   Imports:         {sum(c for c, _ in imports) / 1000:7.1f} ms")
+    print("\n📦 Slowest top-level imports:")
+    for cumulative, name in sorted(imports, reverse=True)[:10]:
+        print(f"   {cumulative / 1000:7.1f} ms  {name}")
+
+
+HELP_TEXTS = {
+    "en": """
+Usage: alltool <command> [args]
+Available commands:
+  create <filename>         Create a file, auto-create folders if needed
+  format <disk> <type>     Format disk (types: ntfs, ext4, vfat)
+  refresh                  Refresh permissions and show PATH setup
+  help [lang]             Show help in en, fr, ar, de
+  sound <file|playlist.txt> Play audio file or playlist (wav, mp3, ogg, flac, aac, m4a)
+    Also folders and .m3u playlists, several at once; --shuffle to shuffle
+  netspeed                Test internet connection speed
+  video <path>           Play video files
+  lib scan <dir...>      Index music/video files (incremental, uses ffprobe)
+  lib find <query>       Search the library, e.g. artist:foo codec:h264
+    sound and video also accept library queries instead of paths
+  downloadvs <url>       Download video or audio from supported websites
+    Queue: downloadvs --queue add <url...> [--file urls.txt] [--force] | run [-j N] [--retries N] | status
+    Archive: downloadvs --archive list | prune [--older-than days] | export [file]; --force re-downloads
+  power                  Manage power profiles and system control
+    - pws: power-saver mode    - pwn: balanced mode      - pwp: performance mode
+    - pwst: power status       - pwo: shutdown           - pwr: reboot
+    - pwl: logout             - pwsu: suspend           - pwh: hibernate
+    - pwlo: lock screen
+  requirement            Check if alltool dependencies are installed
+    Options: --json (machine-readable report), --refresh (ignore cached results)
+  sf                    Show files in current directory
+  sif                   Show detailed system information
+  up                    Check for system updates
+    Options: --ttl <seconds> (cache lifetime, default 6h), --refresh, --background (answer from cache, refresh behind), --json
+  run <script>          Auto-detect and run scripts (py, sh, js, pl, rb, php, jar, cpp)
+    C/C++ builds are cached; options: -O2 or --cflags "<flags>"
+    --bench N [--warmup N] [--json]: time N runs (wall, user/sys CPU, max RSS)
+    --jobs N <script...> or --job-file <file>: run many scripts in parallel, one log per job
+    --watch: re-run (and rebuild) whenever a file in the script's folder changes
+  psg <length> [options] Generate secure password
+    Options: nose (no lowercase), nos (no uppercase), not (no digits), nol (no special)
+  hs <file> <type>      Calculate file hash (md5, sha1, sha256, sha512, blake2b, blake2s)
+    Options: --buffer-size <size> (read chunk, e.g. 4M), --mmap (memory-mapped reads)
+    Use 'all' or a comma list (e.g. sha256,blake2b) to get several hashes in one read
+  hs -r <dir> <type>    Hash a directory tree in parallel, print a sha256sum-style manifest
+    Options: -o <file> (write manifest to file), -j <workers> (default: CPU count)
+    Digests are cached in ~/.cache/alltool; use --no-cache to always re-read files
+  hs --check <manifest> Verify files listed in a SHA256SUMS/md5sum-style file in parallel
+    Options: --type <hash type> (if not detectable), -j <workers>, --quiet (only failures)
+  dup <dir...>          Find duplicate files (size, then first/last 64 KB, then full hash)
+    Options: --type <hash type> (default sha256), -j <workers>, --no-cache
+  sr <topic>            Search the web for information using AI
+    Results are cached for 24h; options: --offline (cache only), --refresh (skip the cache)
+    sr --batch <file> or -q <query> -q <query> [--jobs N] [--rate R]: concurrent queries, JSON lines output
+    sr --bench-parse <saved.html...> [--runs N]: compare result extraction speed and memory
+  wea <city>            Get weather information for a city
+    Several cities: wea London,Paris or --file <cities.txt>; cached 10 min, --refresh to fetch now
+  pr                   Manage poromodor sessions
+   - needed sessions
+   - stop : Stop running Pomodoro timer
    - st : Show Pomodoro timer status and recent activity
   upa                  Updating AllTool
    - st : update to the latest stable version of AllTool
    - pv : update to the latest preview version of AllTool
   cl                    Clear terminal
+  --startup-time <command> [args]  Measure cold-start time and import cost of a command
+  shell                 Interactive AllTool shell with tab completion and history
+  daemon                Keep a warm AllTool process to make every command start faster
+   - start / stop / status : control the background daemon
+   - bench [runs] [command] : compare command latency with and without the daemon
 """,
-            "fr": """
+    "fr": """
 Utilisation : alltool <commande> [arguments]
 Commandes disponibles :
   create <fichier>        Crée un fichier, crée les dossiers si nécessaire
@@ -301,24 +2473,49 @@ Commandes disponibles :
   refresh                 Actualise les permissions et affiche le PATH
   help [langue]          Affiche l'aide en en, fr, ar, de
   sound <fichier|playlist.txt> Joue un fichier audio ou une playlist
+    Accepte aussi des dossiers et des playlists .m3u, plusieurs à la fois ; --shuffle pour mélanger
   netspeed               Test de vitesse internet
   video <chemin>         Lecture de fichiers vidéo
+  lib scan <dossiers...> Indexe la musique et les vidéos (incrémental, via ffprobe)
+  lib find <requête>     Cherche dans la bibliothèque, ex. artist:foo codec:h264
+    sound et video acceptent aussi des requêtes à la place des chemins
   downloadvs <url>       Télécharge une vidéo ou un audio via yt-dlp
+    File d'attente : downloadvs --queue add <url...> [--file urls.txt] [--force] | run [-j N] [--retries N] | status
+    Archive : downloadvs --archive list | prune [--older-than jours] | export [fichier] ; --force retélécharge
   power                  Gestion de l'alimentation et contrôle système
     - pws: mode économie      - pwn: mode équilibré     - pwp: mode performance
     - pwst: état              - pwo: arrêt              - pwr: redémarrage
     - pwl: déconnexion       - pwsu: mise en veille    - pwh: hibernation
     - pwlo: verrouillage
   requirement            Vérifie les dépendances installées
+    Options: --json (rapport lisible par machine), --refresh (ignorer le cache)
   sf                    Affiche les fichiers du répertoire
   sif                   Affiche les informations système détaillées
   up                    Vérifie les mises à jour système
+    Options : --ttl <secondes> (durée du cache, 6h par défaut), --refresh, --background (répondre depuis le cache, actualiser en arrière-plan), --json
   run <script>          Détecte et exécute les scripts automatiquement
+    Les compilations C/C++ sont mises en cache ; options : -O2 ou --cflags "<options>"
+    --bench N [--warmup N] [--json] : mesure N exécutions (temps réel, CPU user/sys, RSS max)
+    --jobs N <scripts...> ou --job-file <fichier> : exécute plusieurs scripts en parallèle, un journal par tâche
+    --watch : relance (et recompile) à chaque modification dans le dossier du script
   psg <longueur> [options] Génère un mot de passe sécurisé
     Options: nose (pas de min.), nos (pas de maj.), not (pas de chiffres), nol (pas de spéciaux)
   hs <fichier> <type>    Calcule le hash d'un fichier
+    Options: --buffer-size <taille> (taille des blocs, ex. 4M), --mmap (lecture mappée en mémoire)
+    Utilisez 'all' ou une liste (ex. sha256,blake2b) pour plusieurs hashs en une lecture
+  hs -r <dossier> <type> Hash parallèle d'une arborescence, manifeste style sha256sum
+    Options: -o <fichier> (écrire le manifeste), -j <workers> (défaut : nombre de CPU)
+    Les hashs sont mis en cache dans ~/.cache/alltool ; --no-cache pour tout relire
+  hs --check <fichier>   Vérifie en parallèle les fichiers d'un SHA256SUMS/md5sum
+    Options: --type <type de hash> (si non détectable), -j <workers>, --quiet (échecs seulement)
+  dup <dossier...>       Trouve les fichiers en double (taille, début/fin 64 Ko, puis hash complet)
+    Options: --type <type de hash> (défaut sha256), -j <workers>, --no-cache
   sr <sujet>            Recherche des informations sur le web en utilisent AI
+    Résultats en cache pendant 24h ; options : --offline (cache uniquement), --refresh (ignorer le cache)
+    sr --batch <fichier> ou -q <requête> -q <requête> [--jobs N] [--rate R] : requêtes concurrentes, sortie en lignes JSON
+    sr --bench-parse <page.html...> [--runs N] : compare vitesse et mémoire de l'extraction des résultats
   wea <ville>           Obtient les informations météo pour une ville
+    Plusieurs villes : wea Londres,Paris ou --file <villes.txt> ; cache de 10 min, --refresh pour actualiser
   pr
    - Sessions nécessaires
    - stop : Arrêter le minuteur Pomodoro en cours
@@ -327,8 +2524,13 @@ Commandes disponibles :
    - st : mise à jour AllTool au dernier stable version
    - pv : mise à jour AllTool au dernier version preview
   cl                     effacer le terminal
+  --startup-time <commande> [arguments]  Mesure le temps de démarrage et le coût des imports
+  shell                  Shell AllTool interactif avec complétion et historique
+  daemon                 Garde un processus AllTool prêt pour accélérer chaque commande
+   - start / stop / status : contrôler le démon en arrière-plan
+   - bench [essais] [commande] : comparer la latence avec et sans le démon
 """,
-            "ar": """
+    "ar": """
 الاستخدام: alltool <الأمر> [المعطيات]
 الأوامر المتاحة:
   create <اسم الملف>        إنشاء ملف، وإنشاء المجلدات تلقائيًا إذا لزم الأمر
@@ -336,24 +2538,49 @@ Commandes disponibles :
   refresh                    تحديث الصلاحيات وعرض إعداد PATH
   help [اللغة]               عرض المساعدة باللغات: en، fr، ar، de
   sound <ملف|playlist.txt>     تشغيل ملف صوتي أو قائمة تشغيل
+    يقبل أيضًا المجلدات وقوائم .m3u، عدة مدخلات معًا؛ --shuffle للتشغيل العشوائي
   netspeed                   اختبار سرعة الإنترنت
   video <المسار>             تشغيل ملفات الفيديو
+  lib scan <مجلدات...>       فهرسة ملفات الموسيقى والفيديو (تدريجيًا عبر ffprobe)
+  lib find <استعلام>         البحث في المكتبة، مثل artist:foo codec:h264
+    يقبل sound و video أيضًا استعلامات المكتبة بدلًا من المسارات
   downloadvs <الرابط>        تحميل فيديو أو صوت من المواقع المدعومة
+    قائمة الانتظار: downloadvs --queue add <روابط...> [--file urls.txt] [--force] | run [-j N] [--retries N] | status
+    الأرشيف: downloadvs --archive list | prune [--older-than أيام] | export [ملف]؛ --force لإعادة التحميل
   power                     إدارة الطاقة والتحكم بالنظام
     - pws: وضع توفير الطاقة    - pwn: وضع متوازن    - pwp: وضع الأداء
     - pwst: حالة الطاقة        - pwo: إيقاف         - pwr: إعادة تشغيل
     - pwl: تسجيل خروج         - pwsu: تعليق        - pwh: سبات
     - pwlo: قفل الشاشة
   requirement               التحقق من المتطلبات المثبتة
+    الخيارات: --json (تقرير بصيغة JSON)، --refresh (تجاهل النتائج المخزنة)
   sf                       عرض الملفات في المجلد الحالي
   sif                      عرض معلومات النظام المفصلة
   up                       التحقق من تحديثات النظام
+    الخيارات: --ttl <ثوانٍ> (مدة التخزين المؤقت، الافتراضي 6 ساعات)، --refresh، --background (الرد من الذاكرة المؤقتة والتحديث في الخلفية)، --json
   run <المسار>              تشغيل السكربتات تلقائيًا
+    يتم تخزين ترجمة C/C++ مؤقتًا؛ الخيارات: -O2 أو --cflags "<خيارات>"
+    --bench N [--warmup N] [--json]: قياس N تشغيلات (الوقت، وقت المعالج، الذاكرة القصوى)
+    --jobs N <سكربتات...> أو --job-file <ملف>: تشغيل عدة سكربتات بالتوازي مع سجل لكل مهمة
+    --watch: إعادة التشغيل (وإعادة الترجمة) عند تغيّر أي ملف في مجلد السكربت
   psg <الطول> [الخيارات]     توليد كلمة مرور آمنة
     الخيارات: nose (بدون صغيرة)، nos (بدون كبيرة)، not (بدون أرقام)، nol (بدون رموز)
   hs <الملف> <النوع>         حساب التجزئة للملف
+    الخيارات: --buffer-size <الحجم> (حجم كتلة القراءة، مثل 4M)، --mmap (قراءة عبر الذاكرة)
+    استخدم all أو قائمة مفصولة بفواصل (مثل sha256,blake2b) لعدة تجزئات بقراءة واحدة
+  hs -r <المجلد> <النوع>      تجزئة مجلد كامل بالتوازي وطباعة قائمة بصيغة sha256sum
+    الخيارات: -o <ملف> (حفظ القائمة في ملف)، -j <عدد العمليات> (الافتراضي: عدد المعالجات)
+    تُحفظ التجزئات مؤقتًا في ~/.cache/alltool؛ استخدم --no-cache لإعادة القراءة دائمًا
+  hs --check <ملف>           التحقق بالتوازي من الملفات المذكورة في ملف SHA256SUMS/md5sum
+    الخيارات: --type <نوع التجزئة> (إن لم يُكتشف)، -j <عدد العمليات>، --quiet (الأخطاء فقط)
+  dup <المجلدات...>          البحث عن الملفات المكررة (الحجم، ثم أول وآخر 64 كيلوبايت، ثم التجزئة الكاملة)
+    الخيارات: --type <نوع التجزئة> (الافتراضي sha256)، -j <عدد العمليات>، --no-cache
   sr <الموضوع>            البحث في الويب عن معلومات باستخدام AI
+    تُخزَّن النتائج مؤقتًا لمدة 24 ساعة؛ الخيارات: --offline (من الذاكرة المؤقتة فقط)، --refresh (تجاهل الذاكرة المؤقتة)
+    sr --batch <ملف> أو -q <استعلام> -q <استعلام> [--jobs N] [--rate R]: استعلامات متزامنة بمخرجات JSON سطرًا بسطر
+    sr --bench-parse <صفحة.html...> [--runs N]: مقارنة سرعة وذاكرة استخراج النتائج
   wea <المدينة>             الحصول على معلومات الطقس للمدينة
+    عدة مدن: wea London,Paris أو --file <ملف>; تخزين مؤقت 10 دقائق، --refresh للتحديث الفوري
   pr
    - عدد الجلسات المرغوب بها
    - stop : إيقاف مؤقت بومودورو قيد التشغيل
@@ -362,8 +2589,13 @@ Commandes disponibles :
     - st : تحديث AllTool إلى أحدث إصدار مستقر
     - pv : تحديث AllTool إلى أحدث إصدار تجريبي
   cl                مسح الطرفية
+  --startup-time <الأمر> [المعطيات]  قياس زمن بدء التشغيل وتكلفة الاستيراد لأمر ما
+  shell             واجهة AllTool تفاعلية مع الإكمال التلقائي وسجل الأوامر
+  daemon            إبقاء عملية AllTool جاهزة لتسريع كل الأوامر
+   - start / stop / status : التحكم في العملية الخلفية
+   - bench [عدد المرات] [الأمر] : مقارنة زمن الاستجابة مع العملية الخلفية وبدونها
 """,
-            "de": """
+    "de": """
 Verwendung: alltool <Befehl> [Argumente]
 Verfügbare Befehle:
   create <Dateiname>        Datei erstellen, Ordner bei Bedarf automatisch
@@ -371,25 +2603,50 @@ Verfügbare Befehle:
   refresh                   Berechtigungen aktualisieren und PATH anzeigen
   help [Sprache]           Hilfe anzeigen in en, fr, ar, de
   sound <Datei|playlist.txt> Audio oder Playlist abspielen
+    Auch Ordner und .m3u-Playlists, mehrere auf einmal; --shuffle zum Mischen
   netspeed                 Internet-Geschwindigkeit testen
   video <Pfad>            Videodateien abspielen
+  lib scan <Ordner...>    Musik- und Videodateien indizieren (inkrementell, mit ffprobe)
+  lib find <Anfrage>      Bibliothek durchsuchen, z. B. artist:foo codec:h264
+    sound und video akzeptieren auch Bibliotheksanfragen statt Pfaden
   downloadvs <URL>         Video oder Audio herunterladen
+    Warteschlange: downloadvs --queue add <URLs...> [--file urls.txt] [--force] | run [-j N] [--retries N] | status
+    Archiv: downloadvs --archive list | prune [--older-than Tage] | export [Datei]; --force lädt erneut
   power                    Energieverwaltung und Systemsteuerung
     - pws: Energiesparmodus    - pwn: Ausgewogen    - pwp: Leistung
     - pwst: Energiestatus      - pwo: Herunterfahren - pwr: Neustart
     - pwl: Abmelden           - pwsu: Bereitschaft  - pwh: Ruhezustand
     - pwlo: Bildschirm sperren
   requirement              Überprüft installierte Abhängigkeiten
+    Optionen: --json (maschinenlesbarer Bericht), --refresh (Cache ignorieren)
   sf                      Zeigt Dateien im aktuellen Verzeichnis
   sif                     Zeigt detaillierte Systeminformationen
   up                      Prüft auf Systemaktualisierungen
+    Optionen: --ttl <Sekunden> (Cache-Dauer, Standard 6h), --refresh, --background (aus dem Cache antworten, im Hintergrund aktualisieren), --json
   run <Pfad>              Führt Skripte automatisch aus
+    C/C++-Builds werden zwischengespeichert; Optionen: -O2 oder --cflags "<Flags>"
+    --bench N [--warmup N] [--json]: misst N Läufe (Laufzeit, User-/Sys-CPU, max. RSS)
+    --jobs N <Skripte...> oder --job-file <Datei>: führt viele Skripte parallel aus, ein Log pro Job
+    --watch: startet (und kompiliert) neu, sobald sich eine Datei im Skriptordner ändert
   psg <Länge> [Optionen]  Generiert sicheres Passwort
     Optionen: nose (keine Kleinbuchstaben), nos (keine Großbuchstaben),
     not (keine Zahlen), nol (keine Sonderzeichen)
   hs <Datei> <Typ>        Berechnet Dateihash
+    Optionen: --buffer-size <Größe> (Blockgröße, z.B. 4M), --mmap (speicherabgebildetes Lesen)
+    'all' oder eine Liste (z.B. sha256,blake2b) berechnet mehrere Hashes in einem Durchlauf
+  hs -r <Ordner> <Typ>    Verzeichnisbaum parallel hashen, Manifest im sha256sum-Format
+    Optionen: -o <Datei> (Manifest in Datei), -j <Worker> (Standard: Anzahl CPUs)
+    Hashes werden in ~/.cache/alltool zwischengespeichert; --no-cache liest immer neu
+  hs --check <Datei>      Dateien aus einer SHA256SUMS/md5sum-Datei parallel prüfen
+    Optionen: --type <Hash-Typ> (falls nicht erkennbar), -j <Worker>, --quiet (nur Fehler)
+  dup <Ordner...>         Doppelte Dateien finden (Größe, erste/letzte 64 KB, dann voller Hash)
+    Optionen: --type <Hash-Typ> (Standard sha256), -j <Worker>, --no-cache
   sr <Thema>              Suche nach Informationen im Web unter Verwendung von KI
+    Ergebnisse werden 24h zwischengespeichert; Optionen: --offline (nur Cache), --refresh (Cache umgehen)
+    sr --batch <Datei> oder -q <Anfrage> -q <Anfrage> [--jobs N] [--rate R]: parallele Anfragen, Ausgabe als JSON-Zeilen
+    sr --bench-parse <Seite.html...> [--runs N]: vergleicht Geschwindigkeit und Speicher der Ergebnisextraktion
   wea <Stadt>             Holt Wetterinformationen für eine Stadt
+    Mehrere Städte: wea London,Paris oder --file <Städte.txt>; 10 Min. Cache, --refresh für sofortigen Abruf
   pr
    - Anzahl der Pomodoro-Sitzungen
    - stop : Laufenden Pomodoro-Timer stoppen
@@ -398,474 +2655,1405 @@ Verfügbare Befehle:
    - st : Aktualisiere AllTool auf die neueste stabile Version
    - pv : Aktualisiere AllTool auf die neueste Vorschauversion
   cl                     Terminal löschen
+  --startup-time <Befehl> [Argumente]  Startzeit und Importkosten eines Befehls messen
+  shell                  Interaktive AllTool-Shell mit Tab-Vervollständigung und Verlauf
+  daemon                 Hält einen AllTool-Prozess bereit, damit jeder Befehl schneller startet
+   - start / stop / status : Hintergrunddienst steuern
+   - bench [Läufe] [Befehl] : Latenz mit und ohne Dienst vergleichen
 """,
-        }
+}
+
+# name -> {"handler": function(args), "usage": one-line usage, "choices": words
+# offered for tab completion}, filled by @command
+COMMANDS = {}
+
+
+def warm_up():
+    # Everything imported here is inherited for free by each forked daemon worker
+    import concurrent.futures
+    import hashlib
+    import json
+    import re
+    import sqlite3
+    import subprocess
+
+    try:
+        import requests
+    except ImportError:
+        pass
+
+    path_index()
+
+
+def daemon_socket_is_ours():
+    # Only trust a socket that we own, inside a directory that only we can write to;
+    # otherwise another user could bind it first and receive our env and terminal
+    uid = os.getuid()
+    try:
+        dir_st = os.lstat(DAEMON_DIR)
+        sock_st = os.lstat(DAEMON_SOCKET)
+    except OSError:
+        return False
+    return (
+        dir_st.st_uid == uid
+        and dir_st.st_mode & 0o170000 == 0o040000  # a real directory, not a symlink
+        and not dir_st.st_mode & 0o077
+        and sock_st.st_uid == uid
+    )
+
+
+def run_in_daemon(argv):
+    # Runs on every call, so only builtin modules here: no socket.py, json or signal
+    if not daemon_socket_is_ours():
+        return None
+    import _socket
 
-        print(help_texts.get(lang, help_texts["en"]))
-    elif command == "sound":
-        if len(sys.argv) < 3:
-            print("Usage: alltool sound <path_to_audio_file_or_playlist.txt>")
+    fields = [str(len(argv)), *argv, os.getcwd()]
+    fields += [f"{key}={value}" for key, value in os.environ.items()]
+    request = b"\0".join(os.fsencode(field) for field in fields)
+    # Hand our stdin/stdout/stderr to the daemon so output streams straight to us
+    fds = b"".join(fd.to_bytes(4, sys.byteorder) for fd in (0, 1, 2))
+
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.connect(DAEMON_SOCKET)
+        # struct ucred {pid, uid, gid}: the process listening must be running as us
+        cred = sock.getsockopt(_socket.SOL_SOCKET, _socket.SO_PEERCRED, 12)
+        if int.from_bytes(cred[4:8], sys.byteorder) != os.getuid():
+            sock.close()
+            return None
+        sock.sendmsg(
+            [len(request).to_bytes(4, "big"), request],
+            [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS, fds)],
+        )
+    except OSError:
+        sock.close()
+        return None
+
+    pid = None
+    buffer = b""
+    try:
+        while True:
+            try:
+                chunk = sock.recv(4096)
+            except KeyboardInterrupt:
+                if pid:
+                    os.killpg(pid, 2)  # SIGINT
+                continue
+            if not chunk:
+                # Daemon went away before running the command: run it here instead
+                return None if pid is None else 1
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                kind, _, value = line.partition(b" ")
+                if kind == b"pid":
+                    pid = int(value)
+                elif kind == b"exit":
+                    return int(value)
+    finally:
+        sock.close()
+
+
+def handle_daemon_client(conn):
+    import signal
+    import socket
+    import traceback
+
+    code = 1
+    try:
+        data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+        length = int.from_bytes(data[:4], "big")
+        data = data[4:]
+        while len(data) < length:
+            chunk = conn.recv(length - len(data))
+            if not chunk:
+                return
+            data += chunk
+        fields = [os.fsdecode(field) for field in data.split(b"\0")]
+        argc = int(fields[0])
+        argv = fields[1 : 1 + argc]
+        cwd = fields[1 + argc]
+        env = dict(item.split("=", 1) for item in fields[2 + argc :] if "=" in item)
+
+        for target, fd in zip((0, 1, 2), fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+        sys.argv = sys.argv[:1] + argv
+
+        # Own process group so the client can forward Ctrl-C to us and our children
+        os.setpgid(0, 0)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        conn.sendall(f"pid {os.getpid()}\n".encode())
+
+        try:
+            dispatch(argv)
+            code = 0
+        except SystemExit as e:
+            if isinstance(e.code, int):
+                code = e.code
+            elif e.code is None:
+                code = 0
+            else:
+                print(e.code, file=sys.stderr)
+        except KeyboardInterrupt:
+            code = 130
+        except Exception:
+            traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            conn.sendall(f"exit {code}\n".encode())
+        except Exception:
+            pass
+        os._exit(0)
+
+
+def prepare_daemon_dir():
+    try:
+        os.mkdir(DAEMON_DIR, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(DAEMON_DIR)
+    if st.st_uid != os.getuid() or st.st_mode & 0o170000 != 0o040000:
+        raise PermissionError(f"{DAEMON_DIR} is not a directory owned by you")
+    os.chmod(DAEMON_DIR, 0o700)
+
+
+def serve_daemon():
+    import signal
+    import socket
+
+    warm_up()
+    script = os.path.abspath(sys.argv[0])
+    source = os.path.abspath(__file__)
+    source_mtime = os.stat(source).st_mtime_ns
+
+    try:
+        prepare_daemon_dir()
+        if os.path.lexists(DAEMON_SOCKET):
+            os.unlink(DAEMON_SOCKET)
+    except OSError as e:
+        print(f"❌ Cannot use {DAEMON_DIR}: {e}", file=sys.stderr)
+        sys.exit(1)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(DAEMON_SOCKET)
+    os.chmod(DAEMON_SOCKET, 0o600)
+    server.listen(64)
+    with open(DAEMON_PID_FILE, "w") as f:
+        f.write(str(os.getpid()))
+
+    def stop(sig, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # workers are reaped automatically
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            if os.stat(source).st_mtime_ns != source_mtime:
+                # AllTool was updated: let this client run locally and restart on new code
+                conn.close()
+                server.close()
+                os.unlink(DAEMON_SOCKET)
+                os.execv(sys.executable, [sys.executable, script, "daemon", "serve"])
+            if os.fork() == 0:
+                server.close()
+                handle_daemon_client(conn)
+            conn.close()
+    finally:
+        for path in (DAEMON_SOCKET, DAEMON_PID_FILE):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def daemon_pid():
+    try:
+        with open(DAEMON_PID_FILE) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return None
+
+
+def bench_daemon(args):
+    import subprocess
+
+    runs = 20
+    if args and args[0].isdigit():
+        runs = int(args[0])
+        args = args[1:]
+    args = args or ["help"]
+    script = os.path.abspath(sys.argv[0])
+
+    def average_ms(env):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, script] + args,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                env=env,
+            )
+            timings.append(time.perf_counter() - start)
+        return sum(timings) / len(timings) * 1000, min(timings) * 1000
+
+    local_env = dict(os.environ, ALLTOOL_NO_DAEMON="1")
+    local_avg, local_min = average_ms(local_env)
+    daemon_avg, daemon_min = average_ms(dict(os.environ))
+    print(f"⏱️ alltool {' '.join(args)} ({runs} runs)")
+    print(f"   In-process: {local_avg:7.1f} ms avg, {local_min:7.1f} ms best")
+    print(f"   Daemon:     {daemon_avg:7.1f} ms avg, {daemon_min:7.1f} ms best")
+    if daemon_avg > 0:
+        print(f"   Speedup:    {local_avg / daemon_avg:.1f}x")
+
+
+def command(name, usage, choices=()):
+    def register(handler):
+        COMMANDS[name] = {"handler": handler, "usage": usage, "choices": choices}
+        return handler
+
+    return register
+
+
+@command("create", "create <filename>")
+def cmd_create(args):
+    import subprocess
+
+    if not args:
+        print("Usage: alltool create <filename>")
+        return
+    filepath = args[0]
+    folder = os.path.dirname(filepath)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    subprocess.run(["touch", filepath])
+
+
+@command("format", "format <disk> <type>")
+def cmd_format(args):
+    import subprocess
+
+    if len(args) < 2:
+        print("Usage: alltool format <disk> <type>")
+        return
+    disk = args[0]
+    fs_type = args[1].lower()
+
+    formatters = {"ntfs": "mkfs.ntfs", "ext4": "mkfs.ext4", "vfat": "mkfs.vfat"}
+
+    if fs_type not in formatters:
+        print(f"Unsupported format type: {fs_type}")
+        print(f"Supported types: {', '.join(formatters.keys())}")
+        return
+
+    print(f"⚠️ Warning: Make sure '{disk}' is a valid device like /dev/sdb1")
+    confirm = input(
+        f"Are you sure you want to format {disk} as {fs_type}? This will erase all data! (yes/no): "
+    )
+    if confirm.lower() != "yes":
+        print("Aborted.")
+        return
+
+    print(f"Formatting {disk} as {fs_type}...")
+    subprocess.run(["sudo", formatters[fs_type], disk])
+
+
+@command("refresh", "refresh")
+def cmd_refresh(args):
+    import subprocess
+
+    print("🔄 Refreshing alltool setup...")
+
+    # Make script executable
+    script_path = os.path.expanduser("~/bin/AllTools.py")
+    subprocess.run(["chmod", "+x", script_path])
+
+    # Detect shell config file
+    shell = os.environ.get("SHELL", "")
+    if "zsh" in shell:
+        config_file = os.path.expanduser("~/.zshrc")
+    elif "bash" in shell:
+        config_file = os.path.expanduser("~/.bashrc")
+    else:
+        config_file = os.path.expanduser("~/.profile")
+
+    # Check if PATH is already set
+    path_line = 'export PATH="$HOME/bin:$PATH"'
+    already_set = False
+    if os.path.exists(config_file):
+        with open(config_file, "r") as f:
+            for line in f:
+                if path_line in line:
+                    already_set = True
+                    break
+
+    # Append if missing
+    if not already_set:
+        with open(config_file, "a") as f:
+            f.write(f"\n# Added by alltool\n{path_line}\n")
+        print(f"✅ PATH updated in {config_file}")
+    else:
+        print(f"ℹ️ PATH already set in {config_file}")
+
+    print("Please run: source ~/.zshrc or restart your terminal to apply changes.")
+    print("Refresh complete.")
+
+
+@command("help", "help [lang]", choices=("en", "fr", "ar", "de"))
+def cmd_help(args):
+    lang = args[0] if args else "en"
+    print(HELP_TEXTS.get(lang, HELP_TEXTS["en"]))
+
+
+@command(
+    "sound",
+    "sound <file|dir|playlist.txt|playlist.m3u|field:value...> [--shuffle]",
+    choices=("--shuffle",),
+)
+def cmd_sound(args):
+    import subprocess
+
+    args = list(args)
+    shuffle = pop_flag(args, "--shuffle")
+    if not args:
+        print("Usage: alltool sound <path_to_audio_file_or_playlist.txt>")
+        return
+    query_given = any(is_media_query(arg) for arg in args)
+    args = resolve_media_queries(args, "audio")
+    if not args:
+        return
+
+    supported_formats = (".wav", ".mp3", ".ogg", ".flac", ".aac", ".m4a")
+
+    if len(args) == 1 and not query_given and not os.path.exists(os.path.expanduser(args[0])):
+        print(f"❌ Error: File '{os.path.expanduser(args[0])}' does not exist.")
+        return
+    single = os.path.expanduser(args[0])
+    if len(args) == 1 and os.path.isfile(single) and not single.lower().endswith((".txt", ".m3u", ".m3u8")):
+        if not single.lower().endswith(supported_formats):
+            print(
+                "❌ Error: Unsupported file format. Supported formats: wav, mp3, ogg, flac, aac, m4a"
+            )
             return
-        input_path = os.path.expanduser(sys.argv[2])
+        print(f"🔊 Playing sound: {single}")
+        subprocess.run(["mpv", "--really-quiet", single])
+        return
+
+    # Validate everything in one pass, then hand the whole list to a single mpv,
+    # which plays it gaplessly without a process (and audio device) per track
+    tracks, skipped = collect_tracks(args, supported_formats)
+    if not tracks:
+        print("❌ No playable tracks found.")
+        return
+    if shuffle:
+        import random
+
+        random.shuffle(tracks)
+
+    import tempfile
+
+    with tempfile.NamedTemporaryFile("w", suffix=".m3u", prefix="alltool-") as playlist:
+        playlist.write("\n".join(tracks) + "\n")
+        playlist.flush()
+        note = f", {skipped} skipped" if skipped else ""
+        print(f"📃 Playing {len(tracks)} tracks{note}")
+        subprocess.run(
+            [
+                "mpv",
+                "--really-quiet",
+                "--no-video",
+                "--gapless-audio=weak",
+                f"--playlist={playlist.name}",
+            ]
+        )
+
 
-        if not os.path.exists(input_path):
-            print(f"❌ Error: File '{input_path}' does not exist.")
+@command("netspeed", "netspeed")
+def cmd_netspeed(args):
+    import subprocess
+
+    print("Measuring network speed...")
+    subprocess.run(["speedtest-cli"])
+
+
+@command(
+    "requirement", "requirement [--json] [--refresh]", choices=("--json", "--refresh")
+)
+def cmd_requirement(args):
+    as_json = "--json" in args
+    if not as_json:
+        print("🔍 Checking system requirements for alltool...")
+
+    requirements = {
+        # Audio/Video tools
+        "mpv": "Sound playback (multi-format)",
+        "ffmpeg": "Video processing and conversion",
+        "ffplay": "Video playback",
+        "ffprobe": "Media library scanning (lib scan)",
+        # Network tools
+        "speedtest-cli": "Network speed test",
+        "yt-dlp": "Download videos and audio from websites",
+        "requests": "Python web requests library",
+        "beautifulsoup4": "HTML parsing benchmark (sr --bench-parse)",
+        # Disk tools
+        "mkfs.ntfs": "Format NTFS disks",
+        "mkfs.ext4": "Format EXT4 disks",
+        "mkfs.vfat": "Format VFAT disks",
+        # System tools
+        "touch": "Create files",
+        "powerprofilesctl": "Power profile management",
+        "systemctl": "System control operations",
+        "xdg-screensaver": "Screen locking capability",
+        "inxi": "System information display",
+        "pkill": "Process management for logout functionality",
+        # Programming languages
+        "python3": "Python runtime (required)",
+        "node": "JavaScript runtime",
+        "perl": "Perl runtime",
+        "ruby": "Ruby runtime",
+        "php": "PHP runtime",
+        "java": "Java runtime",
+        "g++": "C/C++ compiler",
+        # Package managers (for update checking)
+        "apt": "Debian/Ubuntu package manager",
+        "pacman": "Arch Linux package manager",
+        "dnf": "Fedora package manager",
+        "zypper": "openSUSE package manager",
+        "checkupdates": "Arch Linux update checker",
+        # Python standard library modules (built-in)
+        "cmd": "Command line interface framework",
+        "subprocess": "Process execution",
+        "os": "Operating system interface",
+        "random": "Random number generation",
+        "string": "String manipulation",
+        "hashlib": "Hash functions (md5, sha1, sha256, sha512, blake2b, blake2s)",
+        "time": "Time-related functions",
+        "json": "JSON data handling",
+    }
+
+    # Distribution name -> module name
+    python_packages = {"requests": "requests", "beautifulsoup4": "bs4"}
+    # Nice to have: reported, but never counted as missing
+    optional = {"beautifulsoup4"}
+    builtin_modules = [
+        "cmd",
+        "subprocess",
+        "os",
+        "random",
+        "string",
+        "hashlib",
+        "time",
+        "json",
+    ]
+
+    state = requirement_state()
+    results = None if "--refresh" in args else load_requirement_cache(state)
+    if results is None or [r["name"] for r in results] != list(requirements):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def check(tool):
+            if tool in python_packages:
+                return check_requirement(tool, "python", python_packages[tool])
+            if tool in builtin_modules:
+                return check_requirement(tool, "builtin")
+            return check_requirement(tool, "tool")
+
+        # Version probes are subprocesses, so threads run them all at once
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(check, requirements))
+        save_requirement_cache(state, results)
+
+    missing_count = sum(not r["installed"] and r["name"] not in optional for r in results)
+    if as_json:
+        import json
+
+        report = {
+            "host": os.uname().nodename,
+            "missing": missing_count,
+            "requirements": [
+                dict(r, description=requirements[r["name"]], optional=r["name"] in optional)
+                for r in results
+            ],
+        }
+        print(json.dumps(report, indent=2))
+        return
+
+    for r in results:
+        if not r["installed"] and r["name"] in optional:
+            status = "➖ Optional"
+        elif not r["installed"]:
+            status = "❌ Missing"
+        elif r["kind"] == "builtin":
+            status = "✅ Built-in"
+        else:
+            status = "✅ Installed"
+        version = f" ({r['version']})" if r["version"] else ""
+        print(f"{r['name']:<16} {status} — {requirements[r['name']]}{version}")
+
+    if missing_count > 0:
+        print(
+            f"\n⚠️ {missing_count} requirements are missing. Install them for full functionality."
+        )
+        print("💡 Installation commands:")
+        print("   For Python packages: pip install requests")
+        print(
+            "   For Arch Linux: sudo pacman -S mpv ffmpeg speedtest-cli yt-dlp inxi"
+        )
+        print(
+            "   For Ubuntu/Debian: sudo apt install mpv ffmpeg speedtest-cli yt-dlp inxi"
+        )
+        print(
+            "   For Fedora: sudo dnf install mpv ffmpeg speedtest-cli yt-dlp inxi"
+        )
+        print(
+            "   For openSUSE: sudo zypper install mpv ffmpeg speedtest-cli yt-dlp inxi"
+        )
+        print(
+            "   For power management: sudo apt install power-profiles-daemon (Ubuntu) or sudo pacman -S power-profiles-daemon (Arch)"
+        )
+    else:
+        print("\n✅ All requirements are installed!")
+
+
+@command("video", "video <path|field:value...>")
+def cmd_video(args):
+    import subprocess
+
+    if not args:
+        print("Usage: alltool video <path_to_video>")
+        return
+    if any(is_media_query(arg) for arg in args):
+        # ffplay takes one file, so library matches are played one after another
+        for video_path in resolve_media_queries(list(args), "video"):
+            print(f"🎬 Playing video: {video_path}")
+            if subprocess.run(["ffplay", "-autoexit", video_path]).returncode != 0:
+                break
+        return
+    video_path = os.path.expanduser(args[0])
+    if not os.path.exists(video_path):
+        print(f"❌ Error: File '{video_path}' does not exist.")
+        return
+    print(f"🎬 Playing video: {video_path}")
+    subprocess.run(["ffplay", "-autoexit", video_path])
+
+
+@command("lib", "lib scan <dir...> [-j N] | lib find <query>", choices=("scan", "find", "-j"))
+def cmd_lib(args):
+    args = list(args)
+    action = args.pop(0) if args else None
+    if action == "scan":
+        if not has_command("ffprobe"):
+            print("❌ ffprobe is not installed. It comes with ffmpeg.")
             return
+        try:
+            workers = int(pop_option(args, "-j", (os.cpu_count() or 1) * 2))
+        except ValueError:
+            print("❌ -j needs a number of workers.")
+            return
+        if not args:
+            print("Usage: alltool lib scan <dir...> [-j N]")
+            return
+        scan_library(args, max(1, workers))
+    elif action == "find":
+        if not os.path.exists(LIBRARY_DB_PATH):
+            print("❌ No media library yet. Run: alltool lib scan <dir>")
+            return
+        library = MediaLibrary()
+        rows = library.query(" ".join(args))
+        library.close()
+        for path, kind, duration, codec, artist, title in rows:
+            length = f"{int(duration) // 60}:{int(duration) % 60:02d}" if duration else "?"
+            label = " - ".join(part for part in (artist, title) if part) or os.path.basename(path)
+            print(f"{'🎬' if kind == 'video' else '🎵'} {length:>7}  {codec or '?':<6} {label}")
+            print(f"          {path}")
+        print(f"📚 {len(rows)} matches")
+    else:
+        print("Usage: alltool lib scan <dir...> [-j N]")
+        print("       alltool lib find <query>   (e.g. artist:foo codec:h264)")
 
-        supported_formats = [".wav", ".mp3", ".ogg", ".flac", ".aac", ".m4a"]
 
-        # Check if it's a playlist
-        if input_path.lower().endswith(".txt"):
-            print(f"📃 Playing playlist: {input_path}")
-            with open(input_path, "r") as f:
-                for line in f:
-                    audio_file = os.path.expanduser(line.strip())
-                    if not os.path.exists(audio_file):
-                        print(f"⚠️ Skipping missing file: {audio_file}")
-                        continue
-                    if not any(
-                        audio_file.lower().endswith(ext) for ext in supported_formats
-                    ):
-                        print(f"⚠️ Skipping unsupported format: {audio_file}")
-                        continue
-                    print(f"🔊 Playing: {audio_file}")
-                    subprocess.run(["mpv", "--really-quiet", audio_file])
+@command(
+    "downloadvs",
+    "downloadvs <url> [--force] | downloadvs --queue add|run|status | downloadvs --archive list|prune|export",
+    choices=(
+        "--queue", "add", "run", "status", "--file", "-j", "--retries",
+        "--archive", "list", "prune", "export", "--force",
+    ),
+)
+def cmd_downloadvs(args):
+    args = list(args)
+    force = pop_flag(args, "--force")
+    if pop_flag(args, "--queue"):
+        download_queue_command(args, force)
+        return
+    if pop_flag(args, "--archive"):
+        download_archive_command(args)
+        return
+    if not args:
+        print("Usage: alltool downloadvs <video_or_audio_url>")
+        return
+    url = args[0]
+
+    archive = DownloadArchive()
+    archived = None if force else archive.lookup(url)
+    if archived is not None:
+        archive.close()
+        print(f"⏭️ Already downloaded: {archived} (use --force to download again)")
+        return
+
+    # Check if yt-dlp is installed
+    if not has_command("yt-dlp"):
+        print(
+            "❌ yt-dlp is not installed. Please install it with: sudo pacman -S yt-dlp"
+        )
+        archive.close()
+        return
+
+    print(f"⬇️ Downloading from: {url}")
+    returncode, records = run_yt_dlp(url)
+    if returncode == 0 and records:
+        archive.record(url, hash_downloads(records))
+    archive.close()
+
+
+def download_archive_command(args):
+    action = args.pop(0) if args else "list"
+    archive = DownloadArchive()
+    try:
+        if action == "list":
+            entries = archive.entries()
+            for extractor, video_id, url, output, sha256, size, completed_at in entries:
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(completed_at))
+                print(f"{when}  {extractor} {video_id}  {format_size(size or 0):>10}  {output}")
+                print(f"    {url}  sha256:{sha256}")
+            print(f"📦 {len(entries)} archived downloads")
+        elif action == "prune":
+            try:
+                days = pop_option(args, "--older-than")
+                older_than = float(days) * 86400 if days is not None else None
+            except ValueError:
+                print("❌ --older-than needs a number of days.")
+                return
+            removed = archive.prune(older_than)
+            print(f"🧹 Removed {removed} archive entries")
+        elif action == "export":
+            # yt-dlp --download-archive format: "<extractor> <id>" per line
+            lines = [f"{extractor} {video_id}\n" for extractor, video_id, *_ in archive.entries()]
+            if args:
+                with open(os.path.expanduser(args[0]), "w") as f:
+                    f.writelines(lines)
+                print(f"📤 Exported {len(lines)} entries to {args[0]}")
+            else:
+                sys.stdout.writelines(lines)
         else:
-            if not any(input_path.lower().endswith(ext) for ext in supported_formats):
-                print(
-                    "❌ Error: Unsupported file format. Supported formats: wav, mp3, ogg, flac, aac, m4a"
-                )
+            print("Usage: alltool downloadvs --archive list|prune [--older-than days]|export [file]")
+    finally:
+        archive.close()
+
+
+def download_queue_command(args, force=False):
+    action = args.pop(0) if args else "status"
+    if action == "add":
+        try:
+            url_file = pop_option(args, "--file")
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        urls = list(args)
+        if url_file:
+            try:
+                with open(os.path.expanduser(url_file)) as f:
+                    urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+            except OSError as e:
+                print(f"❌ Cannot read {url_file}: {e}")
                 return
-            print(f"🔊 Playing sound: {input_path}")
-            subprocess.run(["mpv", "--really-quiet", input_path])
-    elif command == "netspeed":
-        print("Measuring network speed...")
-        subprocess.run(["speedtest-cli"])
-    elif command == "requirement":
-        print("🔍 Checking system requirements for alltool...")
+        if not urls:
+            print("Usage: alltool downloadvs --queue add <url...> [--file urls.txt] [--force]")
+            return
+        # Leftover options would otherwise be queued (and later run) as URLs
+        options = [url for url in urls if url.startswith("-")]
+        if options:
+            print(f"❌ Unknown option: {options[0]}")
+            return
+        if force:
+            fresh = urls
+        else:
+            archive = DownloadArchive()
+            fresh = [url for url in urls if archive.lookup(url) is None]
+            archive.close()
+        queue = DownloadQueue()
+        # Forced items skip the archive check when the queue runs, too
+        added = queue.add(fresh, os.getcwd(), force)
+        queue.close()
+        print(
+            f"➕ Queued {added} URLs ({len(urls) - len(fresh)} already downloaded, "
+            f"{len(fresh) - added} already in the queue)"
+        )
+    elif action == "run":
+        if not has_command("yt-dlp"):
+            print("❌ yt-dlp is not installed. Please install it with: sudo pacman -S yt-dlp")
+            return
+        try:
+            workers = int(pop_option(args, "-j", 4))
+            retries = int(pop_option(args, "--retries", 3))
+        except ValueError:
+            print("❌ -j and --retries need numbers.")
+            return
+        sys.exit(run_download_queue(max(1, workers), max(0, retries) + 1))
+    elif action == "status":
+        show_download_queue()
+    else:
+        print("Usage: alltool downloadvs --queue add|run|status")
+
+
+@command(
+    "power",
+    "power <pws|pwn|pwp|pwst|pwo|pwr|pwl|pwsu|pwh|pwlo>",
+    choices=("pws", "pwn", "pwp", "pwst", "pwo", "pwr", "pwl", "pwsu", "pwh", "pwlo"),
+)
+def cmd_power(args):
+    import subprocess
+
+    if not args:
+        print(
+            "Usage: alltool power [pws | pwn | pwp | pwst | pwo | pwr | pwl | pwsu | pwh | pwlo]"
+        )
+        return
+
+    subcommand = args[0]
+
+    # Check if powerprofilesctl is available
+    if not has_command("powerprofilesctl"):
+        print(
+            "❌ Error: powerprofilesctl not found. Please install power-profiles-daemon."
+        )
+        return
+
+    if subcommand == "pws":
+        subprocess.run(["powerprofilesctl", "set", "power-saver"])
+        print("✅ Power mode set to: power-saver")
+    elif subcommand == "pwn":
+        subprocess.run(["powerprofilesctl", "set", "balanced"])
+        print("✅ Power mode set to: balanced")
+    elif subcommand == "pwp":
+        result = subprocess.run(
+            ["powerprofilesctl", "list"], capture_output=True, text=True
+        )
+        if "performance" in result.stdout:
+            subprocess.run(["powerprofilesctl", "set", "performance"])
+            print("🚀 Power mode set to: performance")
+        else:
+            print("⚠️ Performance mode is not supported on this system.")
+    elif subcommand == "pwst":
+        result = subprocess.run(
+            ["powerprofilesctl", "get"], capture_output=True, text=True
+        )
+        print(f"🔍 Current power mode: {result.stdout.strip()}")
+    elif subcommand == "pwo":
+        print("Shutting down the system...")
+        subprocess.run(["sudo", "shutdown"])
+    elif subcommand == "pwr":
+        print("Rebooting the system...")
+        subprocess.run(["sudo", "reboot"])
+    elif subcommand == "pwl":
+        print("Logging out...")
+        subprocess.run(["pkill", "-KILL", "-u", os.getlogin()])
+    elif subcommand == "pwsu":
+        print("Suspending the system...")
+        subprocess.run(["systemctl", "suspend"])
+    elif subcommand == "pwh":
+        print("Hibernating the system...")
+        subprocess.run(["systemctl", "hibernate"])
+    elif subcommand == "pwlo":
+        print("Locking the screen...")
+        subprocess.run(["xdg-screensaver", "lock"])
+    else:
+        print(
+            "Usage: alltool power [pws | pwn | pwp | pwst | pwo | pwr | pwl | pwsu | pwh | pwlo]"
+        )
+
+
+@command("sf", "sf")
+def cmd_sf(args):
+    import subprocess
+
+    subprocess.run(["ls"])
+
+
+@command("sif", "sif")
+def cmd_sif(args):
+    import subprocess
+
+    subprocess.run(["inxi", "-F"])
+
+
+@command(
+    "up",
+    "up [--ttl seconds] [--refresh] [--background] [--json]",
+    choices=("--ttl", "--refresh", "--background", "--json"),
+)
+def cmd_up(args):
+    args = list(args)
+    try:
+        ttl = int(pop_option(args, "--ttl", os.environ.get("ALLTOOL_UPDATE_TTL", UPDATE_TTL)))
+    except ValueError:
+        print("❌ --ttl (or ALLTOOL_UPDATE_TTL) needs a number of seconds.")
+        return
+    check_updates(
+        ttl=ttl,
+        refresh=pop_flag(args, "--refresh"),
+        background=pop_flag(args, "--background"),
+        as_json=pop_flag(args, "--json"),
+    )
+
+
+@command(
+    "run",
+    "run <script...> [-O2] [--cflags flags] [--bench N] [--jobs N] [--job-file file] [--watch]",
+    choices=("--cflags", "-O2", "--bench", "--warmup", "--json", "--jobs", "--job-file", "--watch"),
+)
+def cmd_run(args):
+    args = list(args)
+    try:
+        cflags = pop_option(args, "--cflags", "").split()
+    except ValueError:
+        print("❌ --cflags needs a value, e.g. --cflags \"-O2 -march=native\"")
+        return
+    try:
+        bench_runs = int(pop_option(args, "--bench", 0))
+        warmup = int(pop_option(args, "--warmup", 1))
+    except ValueError:
+        print("❌ --bench and --warmup need a number of runs.")
+        return
+    as_json = pop_flag(args, "--json")
+    watch = pop_flag(args, "--watch")
+    try:
+        workers = pop_workers(args, "--jobs")
+    except ValueError:
+        print("❌ --jobs needs a number of workers (1 or more).")
+        return
+    try:
+        job_file = pop_option(args, "--job-file")
+    except ValueError:
+        print("❌ --job-file needs a path.")
+        return
+    # -O0/-O1/-O2/-O3/-Os/-Ofast can be given directly
+    cflags += [arg for arg in args if arg.startswith("-O")]
+    args = [arg for arg in args if not arg.startswith("-O")]
+    if job_file or workers:
+        jobs = [[arg] for arg in args]
+        if job_file:
+            try:
+                jobs += read_job_file(os.path.expanduser(job_file))
+            except (OSError, ValueError) as e:
+                print(f"❌ Cannot read job file: {e}")
+                sys.exit(1)
+        if not jobs:
+            print("❌ No jobs to run.")
+            sys.exit(1)
+        sys.exit(run_jobs(jobs, workers or os.cpu_count() or 1, cflags))
+    if not args:
+        print("Usage: alltool run <script_path> [-O2] [--cflags flags]")
+        return
+    script_path = os.path.expanduser(args[0])
+    if watch:
+        sys.exit(watch_and_run(script_path, cflags))
+    if bench_runs > 0:
+        sys.exit(bench_script(script_path, bench_runs, warmup, cflags, as_json))
+    detect_and_run(script_path, cflags)
 
-        requirements = {
-            # Audio/Video tools
-            "mpv": "Sound playback (multi-format)",
-            "ffmpeg": "Video processing and conversion",
-            "ffplay": "Video playback",
-            # Network tools
-            "speedtest-cli": "Network speed test",
-            "yt-dlp": "Download videos and audio from websites",
-            "requests": "Python web requests library",
-            "beautifulsoup4": "HTML parsing for web search",
-            # Disk tools
-            "mkfs.ntfs": "Format NTFS disks",
-            "mkfs.ext4": "Format EXT4 disks",
-            "mkfs.vfat": "Format VFAT disks",
-            # System tools
-            "touch": "Create files",
-            "powerprofilesctl": "Power profile management",
-            "systemctl": "System control operations",
-            "xdg-screensaver": "Screen locking capability",
-            "inxi": "System information display",
-            "pkill": "Process management for logout functionality",
-            # Programming languages
-            "python3": "Python runtime (required)",
-            "node": "JavaScript runtime",
-            "perl": "Perl runtime",
-            "ruby": "Ruby runtime",
-            "php": "PHP runtime",
-            "java": "Java runtime",
-            "g++": "C/C++ compiler",
-            # Package managers (for update checking)
-            "apt": "Debian/Ubuntu package manager",
-            "pacman": "Arch Linux package manager",
-            "dnf": "Fedora package manager",
-            "zypper": "openSUSE package manager",
-            "checkupdates": "Arch Linux update checker",
-            # Python standard library modules (built-in)
-            "cmd": "Command line interface framework",
-            "subprocess": "Process execution",
-            "os": "Operating system interface",
-            "random": "Random number generation",
-            "string": "String manipulation",
-            "hashlib": "Hash functions (md5, sha1, sha256, sha512, blake2b, blake2s)",
-            "time": "Time-related functions",
-            "json": "JSON data handling",
-        }
 
-        missing_count = 0
-        python_packages = ["requests", "beautifulsoup4"]
-        builtin_modules = [
-            "cmd",
-            "subprocess",
-            "os",
-            "random",
-            "string",
-            "hashlib",
-            "time",
-            "json",
-        ]
-
-        for tool, desc in requirements.items():
-            if tool in python_packages:
-                try:
-                    __import__(tool.split("4")[0])
-                    status = "✅ Installed"
-                except ImportError:
-                    status = "❌ Missing"
-                    missing_count += 1
-            elif tool in builtin_modules:
-                try:
-                    __import__(tool)
-                    status = "✅ Built-in"
-                except ImportError:
-                    status = "❌ Missing"
-                    missing_count += 1
-            else:
-                result = subprocess.run(["which", tool], stdout=subprocess.DEVNULL)
-                status = "✅ Installed" if result.returncode == 0 else "❌ Missing"
-                if result.returncode != 0:
-                    missing_count += 1
+@command(
+    "psg", "psg <length> [nose] [nos] [not] [nol]", choices=("nose", "nos", "not", "nol")
+)
+def cmd_psg(args):
+    if not args:
+        print(
+            "Usage: alltool psg <length> [nose: no lowercase] [nos: no uppercase] [not: no digits] [nol: no speciales]"
+        )
+        sys.exit(1)
 
-            print(f"{tool:<16} {status} — {desc}")
+    try:
+        length = int(args[0])
+    except ValueError:
+        print("❌ Error: Length must be a number.")
+        sys.exit(1)
 
-        if missing_count > 0:
-            print(
-                f"\n⚠️ {missing_count} requirements are missing. Install them for full functionality."
-            )
-            print("💡 Installation commands:")
-            print("   For Python packages: pip install requests beautifulsoup4")
-            print(
-                "   For Arch Linux: sudo pacman -S mpv ffmpeg speedtest-cli yt-dlp inxi"
-            )
-            print(
-                "   For Ubuntu/Debian: sudo apt install mpv ffmpeg speedtest-cli yt-dlp inxi"
-            )
-            print(
-                "   For Fedora: sudo dnf install mpv ffmpeg speedtest-cli yt-dlp inxi"
-            )
-            print(
-                "   For openSUSE: sudo zypper install mpv ffmpeg speedtest-cli yt-dlp inxi"
-            )
-            print(
-                "   For power management: sudo apt install power-profiles-daemon (Ubuntu) or sudo pacman -S power-profiles-daemon (Arch)"
-            )
-        else:
-            print("\n✅ All requirements are installed!")
-    elif command == "video":
-        if len(sys.argv) < 3:
-            print("Usage: alltool video <path_to_video>")
-            return
-        video_path = os.path.expanduser(sys.argv[2])
-        if not os.path.exists(video_path):
-            print(f"❌ Error: File '{video_path}' does not exist.")
-            return
-        print(f"🎬 Playing video: {video_path}")
-        subprocess.run(["ffplay", "-autoexit", video_path])
-    elif command == "downloadvs":
-        if len(sys.argv) < 3:
-            print("Usage: alltool downloadvs <video_or_audio_url>")
-            return
-        url = sys.argv[2]
+    import string, random
 
-        # Check if yt-dlp is installed
-        result = subprocess.run(["which", "yt-dlp"], stdout=subprocess.DEVNULL)
-        if result.returncode != 0:
-            print(
-                "❌ yt-dlp is not installed. Please install it with: sudo pacman -S yt-dlp"
-            )
-            return
+    use_special = "nol" not in args
+    use_digits = "not" not in args
+    use_upper = "nos" not in args
+    use_lower = "nose" not in args
 
-        print(f"⬇️ Downloading from: {url}")
-        subprocess.run(["yt-dlp", url])
-    elif command == "power":
-        if len(sys.argv) < 3:
-            print(
-                "Usage: alltool power [pws | pwn | pwp | pwst | pwo | pwr | pwl | pwsu | pwh | pwlo]"
-            )
-            return
+    chars = ""
+    if use_lower:
+        chars += string.ascii_lowercase
+    if use_upper:
+        chars += string.ascii_uppercase
+    if use_digits:
+        chars += string.digits
+    if use_special:
+        chars += string.punctuation
 
-        subcommand = sys.argv[2]
+    if not chars:
+        print(
+            "❌ Error: No character types selected. Use at least one character set."
+        )
+        sys.exit(1)
 
-        # Check if powerprofilesctl is available
-        if (
-            subprocess.run(
-                ["which", "powerprofilesctl"], stdout=subprocess.DEVNULL
-            ).returncode
-            != 0
-        ):
-            print(
-                "❌ Error: powerprofilesctl not found. Please install power-profiles-daemon."
-            )
-            return
+    password = "".join(random.choice(chars) for _ in range(length))
+    print(f"✅ Generated password: {password}")
 
-        if subcommand == "pws":
-            subprocess.run(["powerprofilesctl", "set", "power-saver"])
-            print("✅ Power mode set to: power-saver")
-        elif subcommand == "pwn":
-            subprocess.run(["powerprofilesctl", "set", "balanced"])
-            print("✅ Power mode set to: balanced")
-        elif subcommand == "pwp":
-            result = subprocess.run(
-                ["powerprofilesctl", "list"], capture_output=True, text=True
-            )
-            if "performance" in result.stdout:
-                subprocess.run(["powerprofilesctl", "set", "performance"])
-                print("🚀 Power mode set to: performance")
-            else:
-                print("⚠️ Performance mode is not supported on this system.")
-        elif subcommand == "pwst":
-            result = subprocess.run(
-                ["powerprofilesctl", "get"], capture_output=True, text=True
-            )
-            print(f"🔍 Current power mode: {result.stdout.strip()}")
-        elif subcommand == "pwo":
-            print("Shutting down the system...")
-            subprocess.run(["sudo", "shutdown"])
-        elif subcommand == "pwr":
-            print("Rebooting the system...")
-            subprocess.run(["sudo", "reboot"])
-        elif subcommand == "pwl":
-            print("Logging out...")
-            subprocess.run(["pkill", "-KILL", "-u", os.getlogin()])
-        elif subcommand == "pwsu":
-            print("Suspending the system...")
-            subprocess.run(["systemctl", "suspend"])
-        elif subcommand == "pwh":
-            print("Hibernating the system...")
-            subprocess.run(["systemctl", "hibernate"])
-        elif subcommand == "pwlo":
-            print("Locking the screen...")
-            subprocess.run(["xdg-screensaver", "lock"])
-        else:
-            print(
-                "Usage: alltool power [pws | pwn | pwp | pwst | pwo | pwr | pwl | pwsu | pwh | pwlo]"
-            )
-    elif command == "sf":
-        subprocess.run(["ls"])
-    elif command == "sif":
-        subprocess.run(["inxi", "-F"])
-    elif command == "up":
-        check_updates()
-    elif command == "run":
-        if len(sys.argv) < 3:
-            print("Usage: alltool run <script_path>")
-            return
-        script_path = os.path.expanduser(sys.argv[2])
-        detect_and_run(script_path)
 
-    elif command == "psg":
-        if len(sys.argv) < 3:
-            print(
-                "Usage: alltool psg <length> [nose: no lowercase] [nos: no uppercase] [not: no digits] [nol: no speciales]"
-            )
-            sys.exit(1)
+@command(
+    "hs",
+    "hs <file> <type>",
+    choices=HASH_TYPES + ("all", "-r", "--check", "--no-cache", "--mmap"),
+)
+def cmd_hs(args):
+    args = list(args)
+    use_mmap = pop_flag(args, "--mmap")
+    recursive = pop_flag(args, "-r")
+    quiet = pop_flag(args, "--quiet")
+    no_cache = pop_flag(args, "--no-cache")
+    try:
+        buffer_size = parse_size(pop_option(args, "--buffer-size", "1M"))
+    except ValueError:
+        print("❌ Error: --buffer-size needs a size like 65536, 256K or 4M.")
+        return
+    try:
+        output_path = pop_option(args, "-o")
+        check_path = pop_option(args, "--check")
+        check_type = pop_option(args, "--type")
+    except ValueError as e:
+        # pop_option's message names the option that is missing its value
+        print(f"❌ Error: {e}.")
+        return
+    try:
+        workers = pop_workers(args, "-j")
+    except ValueError:
+        print("❌ Error: -j needs a number of workers (1 or more).")
+        return
 
+    if check_path:
+        if check_type and check_type.lower() not in HASH_TYPES:
+            print(f"❌ Unsupported hash type: {check_type}")
+            return
         try:
-            length = int(sys.argv[2])
-        except ValueError:
-            print("❌ Error: Length must be a number.")
+            entries = parse_manifest(check_path, check_type and check_type.lower())
+        except OSError as e:
+            print(f"❌ Cannot read checksum file: {e}")
+            sys.exit(1)
+        if not entries:
+            print(f"❌ No valid checksum lines found in {check_path}")
+            sys.exit(1)
+        # Verification always reads the data, a cached digest would hide bit rot
+        ok, mismatched, unreadable, total_bytes, elapsed = check_manifest(
+            entries, workers, quiet
+        )
+        print(
+            f"📊 Verified {ok + mismatched} files ({format_size(total_bytes)}) in {elapsed:.1f}s "
+            f"({total_bytes / elapsed / (1024 * 1024):.1f} MB/s)"
+        )
+        if unreadable:
+            print(f"⚠️ WARNING: {unreadable} listed files could not be read")
+        if mismatched:
+            print(f"⚠️ WARNING: {mismatched} computed checksums did NOT match")
+        if unreadable or mismatched:
             sys.exit(1)
+        print("✅ All checksums match.")
+        return
 
-        import string, random
+    if len(args) != 2:
+        print(
+            "❌ Usage: alltool hs <filename> <hash type: md5; sha1; sha256; sha512; blake2b; blake2s; all; or a comma list> [--buffer-size <size>] [--mmap]"
+        )
+        print(
+            "       alltool hs -r <directory> <hash type> [-o <manifest>] [-j <workers>]"
+        )
+        print(
+            "       alltool hs --check <manifest> [--type <hash type>] [-j <workers>] [--quiet]"
+        )
+        return
 
-        use_special = "nol" not in sys.argv
-        use_digits = "not" not in sys.argv
-        use_upper = "nos" not in sys.argv
-        use_lower = "nose" not in sys.argv
+    file_path = args[0]
 
-        chars = ""
-        if use_lower:
-            chars += string.ascii_lowercase
-        if use_upper:
-            chars += string.ascii_uppercase
-        if use_digits:
-            chars += string.digits
-        if use_special:
-            chars += string.punctuation
+    try:
+        hash_types = parse_hash_types(args[1])
+    except ValueError as e:
+        print(f"❌ Unsupported hash type: {e}")
+        print(
+            "✅ Supported types: md5, sha1, sha256, sha512, blake2b, blake2s, all (or a comma list)"
+        )
+        return
 
-        if not chars:
-            print(
-                "❌ Error: No character types selected. Use at least one character set."
+    if recursive:
+        if not os.path.isdir(file_path):
+            print(f"❌ Directory not found: {file_path}")
+            return
+        try:
+            out = open(output_path, "w") if output_path else sys.stdout
+        except OSError as e:
+            print(f"❌ Cannot write manifest: {e}")
+            return
+        # Opened only once the arguments check out, so usage errors leave no hashes.db behind
+        cache = None if no_cache else open_hash_cache()
+        try:
+            hashed, failed, total_bytes, elapsed = hash_tree(
+                file_path, hash_types, out, buffer_size, workers, cache
             )
+        finally:
+            if output_path:
+                out.close()
+            if cache:
+                cache.close()
+        # Keep stdout clean when the manifest itself goes to stdout
+        log = sys.stdout if output_path else sys.stderr
+        print(
+            f"✅ Hashed {hashed} files, read {format_size(total_bytes)} in {elapsed:.1f}s "
+            f"({total_bytes / elapsed / (1024 * 1024):.1f} MB/s)",
+            file=log,
+        )
+        if cache:
+            print(cache.summary(), file=log)
+        if output_path:
+            print(f"📄 Manifest written to {output_path}")
+        if failed:
+            print(f"⚠️ {failed} files could not be read.", file=log)
             sys.exit(1)
+        return
 
-        password = "".join(random.choice(chars) for _ in range(length))
-        print(f"✅ Generated password: {password}")
-    elif command == "hs":
-        if len(sys.argv) != 4:
-            print(
-                "❌ Usage: alltool hs <filename> <hash type: md5; sha1; sha256; sha512; blake2b; blake2s>"
+    if not os.path.isfile(file_path):
+        print(f"❌ File not found: {file_path}")
+        return
+
+    cache = None if no_cache else open_hash_cache()
+    try:
+        st = os.stat(file_path)
+        digests = cache.lookup(st, hash_types) if cache else None
+        if digests is None:
+            hashers = hash_file(
+                file_path, hash_types, buffer_size=buffer_size, use_mmap=use_mmap
             )
-            return
+            digests = {hash_type: h.hexdigest() for hash_type, h in hashers.items()}
+            if cache:
+                cache.store(st, digests)
+    except OSError as e:
+        print(f"❌ Error reading file: {e}")
+        return
+    finally:
+        if cache:
+            cache.close()
+    if len(digests) == 1:
+        hash_type, digest = next(iter(digests.items()))
+        print(f"🔐 {hash_type.upper()} hash of '{file_path}':\n{digest}")
+    else:
+        print(f"🔐 Hashes of '{file_path}':")
+        for hash_type, digest in digests.items():
+            print(f"{hash_type.upper():<8} {digest}")
+    if cache:
+        print(cache.summary())
 
-        file_path = sys.argv[2]
-        hash_type = sys.argv[3].lower()
 
-        if not os.path.isfile(file_path):
-            print(f"❌ File not found: {file_path}")
+@command("dup", "dup <dir...>", choices=("--type", "--no-cache"))
+def cmd_dup(args):
+    args = list(args)
+    no_cache = pop_flag(args, "--no-cache")
+    try:
+        hash_type = pop_option(args, "--type", "sha256").lower()
+    except ValueError:
+        print("❌ Error: --type needs a hash type.")
+        return
+    try:
+        workers = pop_workers(args, "-j")
+    except ValueError:
+        print("❌ Error: -j needs a number of workers (1 or more).")
+        return
+    if not args:
+        print(
+            "Usage: alltool dup <directory...> [--type <hash type>] [-j <workers>] [--no-cache]"
+        )
+        return
+    if hash_type not in HASH_TYPES:
+        print(f"❌ Unsupported hash type: {hash_type}")
+        print("✅ Supported types: md5, sha1, sha256, sha512, blake2b, blake2s")
+        return
+    for folder in args:
+        if not os.path.isdir(folder):
+            print(f"❌ Directory not found: {folder}")
             return
 
-        hash_map = {
-            "md5": hashlib.md5,
-            "sha1": hashlib.sha1,
-            "sha256": hashlib.sha256,
-            "sha512": hashlib.sha512,
-            "blake2b": hashlib.blake2b,
-            "blake2s": hashlib.blake2s,
-        }
+    print(f"🔍 Looking for duplicate files in: {', '.join(args)}")
+    # Opened only once the arguments check out, as in cmd_hs
+    cache = None if no_cache else open_hash_cache()
+    start = time.perf_counter()
+    try:
+        duplicates, scanned = find_duplicates(args, hash_type, workers, cache)
+    finally:
+        if cache:
+            cache.close()
+    elapsed = time.perf_counter() - start
 
-        if hash_type not in hash_map:
-            print(f"❌ Unsupported hash type: {hash_type}")
-            print("✅ Supported types: md5, sha1, sha256, sha512, blake2b, blake2s")
-            return
+    wasted = 0
+    for i, (size, paths) in enumerate(duplicates, 1):
+        wasted += size * (len(paths) - 1)
+        print(f"\n🔁 Set {i}: {len(paths)} files of {format_size(size)}")
+        for path in paths:
+            print(f"   {path}")
 
-        with open(file_path, "rb") as f:
-            data = f.read()
-            hash_obj = hash_map[hash_type]()
-            hash_obj.update(data)
-            print(
-                f"🔐 {hash_type.upper()} hash of '{file_path}':\n{hash_obj.hexdigest()}"
-            )
-    elif command == "sr":
-        if len(sys.argv) < 3:
-            print("❌ Usage: alltool sr <search topic>")
-            return
-        topic = " ".join(sys.argv[2:]).strip()
-        if not topic:
-            print("❌ Empty search topic.")
-            return
+    print(f"\n📊 Scanned {scanned} files in {elapsed:.1f}s")
+    if duplicates:
+        print(
+            f"⚠️ {len(duplicates)} duplicate sets found, {format_size(wasted)} could be freed."
+        )
+    else:
+        print("✅ No duplicate files found.")
+    if cache:
+        print(cache.summary())
 
-        print(f"🔍 Searching for: {topic}")
 
+@command(
+    "sr",
+    "sr <topic> [--offline] [--refresh] | sr --batch <file> | sr -q <query> -q <query>",
+    choices=("--offline", "--refresh", "--batch", "-q", "--jobs", "--rate", "--bench-parse"),
+)
+def cmd_sr(args):
+    args = list(args)
+    if pop_flag(args, "--bench-parse"):
+        if not args:
+            print("❌ Usage: alltool sr --bench-parse <saved.html...> [--runs N]")
+            return
         try:
-            # Using a different endpoint that's more reliable
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
+            runs = int(pop_option(args, "--runs", 20))
+        except ValueError:
+            print("❌ --runs needs a number.")
+            return
+        bench_parse(args, max(1, runs))
+        return
+    offline = pop_flag(args, "--offline")
+    refresh = pop_flag(args, "--refresh")
+    try:
+        batch_file = pop_option(args, "--batch")
+        workers = int(pop_option(args, "--jobs", 8))
+        rate = float(pop_option(args, "--rate", 2.0))
+        queries = []
+        while "-q" in args:
+            queries.append(pop_option(args, "-q"))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    if batch_file or queries:
+        if batch_file:
+            try:
+                with open(os.path.expanduser(batch_file)) as f:
+                    queries += [line.strip() for line in f if line.strip()]
+            except OSError as e:
+                print(f"❌ Cannot read {batch_file}: {e}")
+                sys.exit(1)
+        sys.exit(batch_search(queries, max(1, workers), rate, offline, refresh))
+    if not args:
+        print("❌ Usage: alltool sr <search topic>")
+        return
+    topic = " ".join(args).strip()
+    if not topic:
+        print("❌ Empty search topic.")
+        return
 
-            # Using DuckDuckGo's HTML API
-            url = f"https://html.duckduckgo.com/html/"
-            params = {"q": topic, "kl": "us-en"}
+    print(f"🔍 Searching for: {topic}")
 
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            response.raise_for_status()
+    cache = open_search_cache()
+    try:
+        cached = None
+        if cache and not refresh:
+            # Offline mode serves whatever is cached, however old
+            cached = cache.lookup(topic, ttl=None if offline else search_cache_ttl())
+        if cached is not None:
+            results, fetched_at = cached
+            age = int(time.time() - fetched_at) // 60
+            print(f"💾 From cache ({age} min old)")
+        elif offline:
+            print("❌ No cached results for this query (offline mode).")
+            return
+        else:
+            session = http_session()
+            if session is None:
+                return
+            import requests
 
-            if "No results found." in response.text:
-                print("❌ No results found for your query.")
+            try:
+                results = search_web(session, topic)
+            except requests.RequestException as e:
+                print(f"❌ Network error: {e}")
+                print("💡 Try checking your internet connection or try again later.")
                 return
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                print("💡 Please try rephrasing your search query.")
+                return
+            # An empty page may be a captcha/anomaly page; don't cache it for a day
+            if cache and results:
+                cache.store(topic, results)
+    finally:
+        if cache:
+            cache.close()
 
-            # Extract first few results
-            from bs4 import BeautifulSoup
+    if not results:
+        print("❌ No results found for your query.")
+        return
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            results = soup.find_all("div", class_="result__body")
+    print("\n📚 Search Results:\n")
+    for i, result in enumerate(results, 1):
+        print(f"{i}. {result['title']}")
+        print(f"   {result['snippet']}\n")
 
-            if not results:
-                print("❌ No results could be extracted.")
-                return
 
-            print("\n📚 Search Results:\n")
-            for i, result in enumerate(results[:5], 1):
-                title = result.find("a", class_="result__a")
-                snippet = result.find("a", class_="result__snippet")
+@command(
+    "wea",
+    "wea <city[,city...]> [--file cities.txt] [--refresh]",
+    choices=("--file", "--refresh"),
+)
+def cmd_wea(args):
+    # Weather CLI
+    args = list(args)
+    refresh = pop_flag(args, "--refresh")
+    try:
+        city_file = pop_option(args, "--file")
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    cities = [city.strip() for city in " ".join(args).split(",") if city.strip()]
+    if city_file:
+        try:
+            with open(os.path.expanduser(city_file)) as f:
+                cities += [line.strip() for line in f if line.strip()]
+        except OSError as e:
+            print(f"❌ Cannot read {city_file}: {e}")
+            return
+    cities = list(dict.fromkeys(cities))
+    if not cities:
+        print("❌ Please provide a city name. Usage: alltool wea [city]")
+        return
+    print(f"🌦️  Getting weather for: {', '.join(cities)}")
+
+    # Stale-while-revalidate: fresh entries are used as is, stale ones are shown
+    # at once and refreshed by a detached process, missing ones are fetched now
+    cache = {} if refresh else load_weather_cache()
+    ttl = int(os.environ.get("ALLTOOL_WEATHER_TTL", WEATHER_TTL))
+    now = time.time()
+    stale, missing = [], []
+    for city in cities:
+        entry = cache.get(city.lower())
+        if entry is None:
+            missing.append(city)
+        elif now - entry["fetched_at"] > ttl:
+            stale.append(city)
+    if stale:
+        refresh_weather_in_background(stale)
+    fetched, errors = fetch_weather_many(missing) if missing else ({}, {})
 
-                if title and snippet:
-                    print(f"{i}. {title.text.strip()}")
-                    print(f"   {snippet.text.strip()}\n")
+    for city in cities:
+        prefix = f"{city}: " if len(cities) > 1 else ""
+        if city in fetched:
+            print(f"   {prefix}{fetched[city]}")
+        elif city in errors:
+            print(f"❌ Failed to get weather data for '{city}': {errors[city]}")
+        else:
+            entry = cache[city.lower()]
+            age = int(now - entry["fetched_at"]) // 60
+            note = f" (cached {age} min ago, refreshing)" if city in stale else ""
+            print(f"   {prefix}{entry['text']}{note}")
+    if errors and len(errors) == len(cities):
+        print("💡 Try checking your internet connection or try again later.")
 
-        except requests.RequestException as e:
-            print(f"❌ Network error: {e}")
-            print("💡 Try checking your internet connection or try again later.")
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            print("💡 Please try rephrasing your search query.")
-    elif command == "wea":
-        # Weather CLI
-        if len(sys.argv) < 3:
-            print("❌ Please provide a city name. Usage: alltool wea [city]")
-            return
-        city = " ".join(sys.argv[2:])
-        print(f"🌦️  Getting weather for: {city}")
+
+@command("pr", "pr <sessions|stop|st>", choices=("stop", "st"))
+def cmd_pr(args):
+    import subprocess
+
+    if not args:
+        print("Usage: alltool pr <number_of_sessions>")
+        print("       alltool pr stop")
+        print("       alltool pr st")
+        return
+
+    if args[0] == "stop":
+        # Stop Pomodoro timer
         try:
-            url = f"https://wttr.in/{city}"
-            params = {"format": "2"}
-            resp = requests.get(url, params=params, timeout=8)
-            if resp.status_code == 200:
-                print(f"   {resp.text.strip()}")
+            # Find and kill the Pomodoro process
+            result = subprocess.run(
+                ["pgrep", "-f", "pomodoro_timer"], capture_output=True, text=True
+            )
+            if result.returncode == 0:
+                pids = result.stdout.strip().split("\n")
+                for pid in pids:
+                    if pid:
+                        subprocess.run(["kill", pid])
+                print("✅ Pomodoro timer stopped")
             else:
-                print(f"❌ Failed to get weather data for '{city}'.")
-        except requests.RequestException as e:
-            print(f"❌ Network error: {e}")
-            print("💡 Try checking your internet connection or try again later.")
+                print("ℹ️ No Pomodoro timer running")
         except Exception as e:
-            print(f"❌ Error: {e}")
-            print("💡 Please try rephrasing your city or check for typos.")
-    elif command == "pr":
-        if len(sys.argv) < 3:
-            print("Usage: alltool pr <number_of_sessions>")
-            print("       alltool pr stop")
-            print("       alltool pr st")
-            return
+            print(f"❌ Error stopping timer: {e}")
+        return
 
-        if sys.argv[2] == "stop":
-            # Stop Pomodoro timer
-            try:
-                # Find and kill the Pomodoro process
-                result = subprocess.run(
-                    ["pgrep", "-f", "pomodoro_timer"], capture_output=True, text=True
-                )
-                if result.returncode == 0:
-                    pids = result.stdout.strip().split("\n")
-                    for pid in pids:
-                        if pid:
-                            subprocess.run(["kill", pid])
-                    print("✅ Pomodoro timer stopped")
-                else:
-                    print("ℹ️ No Pomodoro timer running")
-            except Exception as e:
-                print(f"❌ Error stopping timer: {e}")
-            return
+    elif args[0] == "st":
+        # Show Pomodoro timer status
+        try:
+            # Check if Pomodoro process is running
+            result = subprocess.run(
+                ["pgrep", "-f", "pomodoro_timer"], capture_output=True, text=True
+            )
+            if result.returncode == 0:
+                pids = result.stdout.strip().split("\n")
+                print("🍅 Pomodoro timer is running")
+                print(f"📊 Process IDs: {', '.join([pid for pid in pids if pid])}")
 
-        elif sys.argv[2] == "st":
-            # Show Pomodoro timer status
-            try:
-                # Check if Pomodoro process is running
-                result = subprocess.run(
-                    ["pgrep", "-f", "pomodoro_timer"], capture_output=True, text=True
-                )
-                if result.returncode == 0:
-                    pids = result.stdout.strip().split("\n")
-                    print("🍅 Pomodoro timer is running")
-                    print(f"📊 Process IDs: {', '.join([pid for pid in pids if pid])}")
-
-                    # Show log file content if it exists
-                    log_file = os.path.expanduser("~/.alltool_pomodoro.log")
-                    if os.path.exists(log_file):
-                        print(f"\n📄 Recent activity from {log_file}:")
-                        print("-" * 50)
-                        try:
-                            with open(log_file, "r") as f:
-                                lines = f.readlines()
-                                # Show last 10 lines
-                                for line in lines[-10:]:
-                                    print(line.strip())
-                        except Exception as e:
-                            print(f"❌ Error reading log file: {e}")
-                    else:
-                        print("ℹ️ No log file found")
+                # Show log file content if it exists
+                log_file = os.path.expanduser("~/.alltool_pomodoro.log")
+                if os.path.exists(log_file):
+                    print(f"\n📄 Recent activity from {log_file}:")
+                    print("-" * 50)
+                    try:
+                        with open(log_file, "r") as f:
+                            lines = f.readlines()
+                            # Show last 10 lines
+                            for line in lines[-10:]:
+                                print(line.strip())
+                    except Exception as e:
+                        print(f"❌ Error reading log file: {e}")
                 else:
-                    print("ℹ️ No Pomodoro timer running")
-                    print("💡 Use 'alltool pr <sessions>' to start a timer")
-            except Exception as e:
-                print(f"❌ Error checking timer status: {e}")
-            return
+                    print("ℹ️ No log file found")
+            else:
+                print("ℹ️ No Pomodoro timer running")
+                print("💡 Use 'alltool pr <sessions>' to start a timer")
+        except Exception as e:
+            print(f"❌ Error checking timer status: {e}")
+        return
 
-        try:
-            sessions = int(sys.argv[2])
-            if sessions <= 0:
-                print("❌ Error: Sessions must be greater than 0")
-                return
+    try:
+        sessions = int(args[0])
+        if sessions <= 0:
+            print("❌ Error: Sessions must be greater than 0")
+            return
 
-            # Create Pomodoro timer script
-            pomodoro_script = f"""#!/usr/bin/env python3
+        # Create Pomodoro timer script
+        pomodoro_script = f"""#!/usr/bin/env python3
 def signal_handler(sig, frame):
     print("\\n⏹️ Pomodoro timer stopped by user")
     sys.exit(0)
@@ -911,125 +4099,322 @@ for session in range(1, sessions + 1):
 print(f"\\n🎉 All {{sessions}} Pomodoro sessions completed!")
 print("🏆 Great job! You've finished your work session.")
 """
-            script_path = "/tmp/pomodoro_timer.py"
-            with open(script_path, "w") as f:
-                f.write(pomodoro_script)
-            subprocess.run(["chmod", "+x", script_path])
-            log_file = os.path.expanduser("~/.alltool_pomodoro.log")
-            with open(log_file, "w") as log:
-                process = subprocess.Popen(
-                    [sys.executable, script_path],
-                    stdout=log,
-                    stderr=log,
-                    preexec_fn=os.setsid,
-                )
+        script_path = "/tmp/pomodoro_timer.py"
+        with open(script_path, "w") as f:
+            f.write(pomodoro_script)
+        subprocess.run(["chmod", "+x", script_path])
+        log_file = os.path.expanduser("~/.alltool_pomodoro.log")
+        with open(log_file, "w") as log:
+            process = subprocess.Popen(
+                [sys.executable, script_path],
+                stdout=log,
+                stderr=log,
+                preexec_fn=os.setsid,
+            )
 
-            print("✅ Pomodoro timer started in background")
-            print(f"📄 Progress is logged to {log_file}")
-            print("💡 Use 'alltool pr stop' to stop the timer")
-            print("💡 Use 'tail -f ~/.alltool_pomodoro.log' to watch progress")
+        print("✅ Pomodoro timer started in background")
+        print(f"📄 Progress is logged to {log_file}")
+        print("💡 Use 'alltool pr stop' to stop the timer")
+        print("💡 Use 'tail -f ~/.alltool_pomodoro.log' to watch progress")
 
-        except ValueError:
-            print("❌ Error: Sessions must be a number")
+    except ValueError:
+        print("❌ Error: Sessions must be a number")
+        return
+    except Exception as e:
+        print(f"❌ Error starting Pomodoro timer: {e}")
+        return
+
+
+@command("cl", "cl")
+def cmd_cl(args):
+    import subprocess
+
+    subprocess.run(["clear"])
+
+
+@command("upa", "upa <st|pv>", choices=("st", "pv"))
+def cmd_upa(args):
+    import re
+
+    requests = import_requests()
+    if requests is None:
+        return
+
+    avup = ["st", "pv"]
+    if args:
+        subc = args[0]
+        if subc not in avup:
+            print(f"❌ Command {subc} not found.")
+            print(
+                "availbe commands: st: download latest AllTool stable version, pv: download latest AllTool preview version."
+            )
+        elif subc == "st":
+            githubst = "https://raw.githubusercontent.com/Iinitialb/AllTool-Linux/refs/heads/Stable/AllToolInstaller.py"
+
+            def get_remote_version_and_code():
+                response = requests.get(githubst)
+                if response.status_code == 200:
+                    code = response.text
+                    match = re.search(r'__version__\s*=\s*["\']([\d.]+)["\']', code)
+                    return match.group(1) if match else None, code
+                return None, None
+
+            def get_local_version():
+                try:
+                    with open(LOCAL_PATH, "r", encoding="utf-8") as f:
+                        code = f.read()
+                    match = re.search(r'__version__\s*=\s*["\']([\d.]+)["\']', code)
+                    return match.group(1) if match else None
+                except FileNotFoundError:
+                    return None
+
+            def update_script():
+                remote_version, remote_code = get_remote_version_and_code()
+                local_version = get_local_version()
+
+                if remote_version and (
+                    local_version is None
+                    or version.parse(remote_version) > version.parse(local_version)
+                ):
+                    with open(LOCAL_PATH, "w", encoding="utf-8") as f:
+                        f.write(remote_code)
+                    print(
+                        f"✅ Updated AllTool.py from {local_version} to {remote_version}"
+                    )
+                else:
+                    print("✅ Already up to date.")
+
+            update_script()
+        elif subc == "pv":
+            githubpr = "https://raw.githubusercontent.com/Iinitialb/AllTool-Linux/refs/heads/Preview/AllTools.py"
+
+            def get_remote_version_and_code1():
+                response = requests.get(githubpr)
+                if response.status_code == 200:
+                    code = response.text
+                    match = re.search(r'__version__\s*=\s*["\']([\d.]+)["\']', code)
+                    return match.group(1) if match else None, code
+                return None, None
+
+            def get_local_version1():
+                try:
+                    with open(LOCAL_PATH, "r", encoding="utf-8") as f:
+                        code = f.read()
+                    match = re.search(r'__version__\s*=\s*["\']([\d.]+)["\']', code)
+                    return match.group(1) if match else None
+                except FileNotFoundError:
+                    return None
+
+            def update_script1():
+                remote_version, remote_code = get_remote_version_and_code1()
+                local_version = get_local_version1()
+
+                if remote_version and (
+                    local_version is None
+                    or version.parse(remote_version) > version.parse(local_version)
+                ):
+                    with open(LOCAL_PATH, "w", encoding="utf-8") as f:
+                        f.write(remote_code)
+                    print(
+                        f"✅ Updated AllTool.py from {local_version} to {remote_version}"
+                    )
+                else:
+                    print("✅ Already up to date.")
+
+            update_script1()
+    else:
+        print(
+            "Usage: alltool upa [updating version, st: updating to the latest stable version] or pv: updating to the latest preview version"
+        )
+
+
+@command("un", "un")
+def cmd_un(args):
+    print("Welcome, AllTool uninstaller")
+    uncon()
+
+
+@command(
+    "daemon",
+    "daemon <start|stop|status|bench>",
+    choices=("start", "stop", "status", "bench"),
+)
+def cmd_daemon(args):
+    import subprocess
+
+    subc = args[0] if args else ""
+    if subc == "serve":
+        serve_daemon()
+    elif subc == "start":
+        if daemon_pid():
+            print("ℹ️ AllTool daemon is already running")
             return
-        except Exception as e:
-            print(f"❌ Error starting Pomodoro timer: {e}")
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(sys.argv[0]), "daemon", "serve"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        for _ in range(50):
+            if os.path.exists(DAEMON_SOCKET) and daemon_pid():
+                print(f"✅ AllTool daemon started (socket: {DAEMON_SOCKET})")
+                return
+            time.sleep(0.1)
+        print("❌ AllTool daemon did not start")
+    elif subc == "stop":
+        pid = daemon_pid()
+        if pid is None:
+            print("ℹ️ AllTool daemon is not running")
             return
-    elif command == "cl":
-        subprocess.run(["clear"])
-    elif command == "upa":
-        avup = ["st", "pv"]
-        if len(sys.argv) > 2:
-            subc = sys.argv[2]
-            if subc not in avup:
-                print(f"❌ Command {subc} not found.")
-                print(
-                    "availbe commands: st: download latest AllTool stable version, pv: download latest AllTool preview version."
-                )
-            elif subc == "st":
-                githubst = "https://raw.githubusercontent.com/Iinitialb/AllTool-Linux/refs/heads/Stable/AllToolInstaller.py"
-
-                def get_remote_version_and_code():
-                    response = requests.get(githubst)
-                    if response.status_code == 200:
-                        code = response.text
-                        match = re.search(r'__version__\s*=\s*["\']([\d.]+)["\']', code)
-                        return match.group(1) if match else None, code
-                    return None, None
-
-                def get_local_version():
-                    try:
-                        with open(LOCAL_PATH, "r", encoding="utf-8") as f:
-                            code = f.read()
-                        match = re.search(r'__version__\s*=\s*["\']([\d.]+)["\']', code)
-                        return match.group(1) if match else None
-                    except FileNotFoundError:
-                        return None
-
-                def update_script():
-                    remote_version, remote_code = get_remote_version_and_code()
-                    local_version = get_local_version()
-
-                    if remote_version and (
-                        local_version is None
-                        or version.parse(remote_version) > version.parse(local_version)
-                    ):
-                        with open(LOCAL_PATH, "w", encoding="utf-8") as f:
-                            f.write(remote_code)
-                        print(
-                            f"✅ Updated AllTool.py from {local_version} to {remote_version}"
-                        )
-                    else:
-                        print("✅ Already up to date.")
-
-                update_script()
-            elif subc == "pv":
-                githubpr = "https://raw.githubusercontent.com/Iinitialb/AllTool-Linux/refs/heads/Preview/AllTools.py"
-
-                def get_remote_version_and_code1():
-                    response = requests.get(githubpr)
-                    if response.status_code == 200:
-                        code = response.text
-                        match = re.search(r'__version__\s*=\s*["\']([\d.]+)["\']', code)
-                        return match.group(1) if match else None, code
-                    return None, None
-
-                def get_local_version1():
-                    try:
-                        with open(LOCAL_PATH, "r", encoding="utf-8") as f:
-                            code = f.read()
-                        match = re.search(r'__version__\s*=\s*["\']([\d.]+)["\']', code)
-                        return match.group(1) if match else None
-                    except FileNotFoundError:
-                        return None
-
-                def update_script1():
-                    remote_version, remote_code = get_remote_version_and_code1()
-                    local_version = get_local_version1()
-
-                    if remote_version and (
-                        local_version is None
-                        or version.parse(remote_version) > version.parse(local_version)
-                    ):
-                        with open(LOCAL_PATH, "w", encoding="utf-8") as f:
-                            f.write(remote_code)
-                        print(
-                            f"✅ Updated AllTool.py from {local_version} to {remote_version}"
-                        )
-                    else:
-                        print("✅ Already up to date.")
-
-                update_script1()
+        import signal
+
+        os.kill(pid, signal.SIGTERM)
+        print("✅ AllTool daemon stopped")
+    elif subc == "status":
+        pid = daemon_pid()
+        if pid:
+            print(f"✅ AllTool daemon is running (PID {pid}, socket: {DAEMON_SOCKET})")
         else:
-            print(
-                "Usage: alltool upa [updating version, st: updating to the latest stable version] or pv: updating to the latest preview version"
-            )
-    elif command == "un":
-        print("Welcome, AllTool uninstaller")
-        uncon()
+            print("ℹ️ AllTool daemon is not running")
+    elif subc == "bench":
+        if not daemon_pid():
+            print("❌ AllTool daemon is not running. Start it with: alltool daemon start")
+            return
+        bench_daemon(args[1:])
     else:
-        print(f"❌ Unknown command: {command}")
+        print("Usage: alltool daemon <start | stop | status | bench [runs] [command...]>")
+
+
+@command("shell", "shell")
+def cmd_shell(args):
+    import cmd
+    import glob
+    import shlex
+
+    try:
+        import readline
+    except ImportError:
+        readline = None
+
+    history_file = os.path.expanduser("~/.alltool_history")
+
+    class AllToolShell(cmd.Cmd):
+        intro = "🛠️ AllTool shell: type 'help' for commands, 'exit' to quit."
+        prompt = "alltool> "
+
+        def default(self, line):
+            try:
+                argv = shlex.split(line)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            # Same process for every command: imports and caches stay warm
+            try:
+                dispatch(argv)
+            except SystemExit:
+                pass
+            except KeyboardInterrupt:
+                print("\n⏹️ Interrupted")
+            except Exception as e:
+                print(f"❌ Error: {e}")
+
+        def emptyline(self):
+            pass
+
+        def do_help(self, arg):
+            self.default(f"help {arg}")
+
+        def do_cd(self, arg):
+            try:
+                os.chdir(os.path.expanduser(arg.strip() or "~"))
+            except OSError as e:
+                print(f"❌ {e}")
+
+        def do_exit(self, arg):
+            return True
+
+        do_quit = do_exit
+
+        def do_EOF(self, arg):
+            print()
+            return True
+
+        def completenames(self, text, *ignored):
+            names = list(COMMANDS) + ["cd", "exit", "quit"]
+            return [name for name in names if name.startswith(text)]
+
+        def completedefault(self, text, line, begidx, endidx):
+            name = line.split()[0] if line.split() else ""
+            entry = COMMANDS.get(name)
+            choices = [c for c in entry["choices"] if c.startswith(text)] if entry else []
+            paths = [
+                path + "/" if os.path.isdir(path) else path
+                for path in glob.glob(os.path.expanduser(text) + "*")
+            ]
+            return choices + sorted(paths)
+
+        def complete_cd(self, text, line, begidx, endidx):
+            return [
+                path + "/" for path in glob.glob(os.path.expanduser(text) + "*")
+                if os.path.isdir(path)
+            ]
+
+    if readline:
+        # Complete file names containing dots, dashes and slashes as one word
+        readline.set_completer_delims(" \t\n")
+        try:
+            readline.read_history_file(history_file)
+        except OSError:
+            pass
+        readline.set_history_length(1000)
+
+    shell = AllToolShell()
+    while True:
+        try:
+            shell.cmdloop()
+            break
+        except KeyboardInterrupt:
+            # Ctrl-C at the prompt clears the line instead of leaving the shell
+            print("^C")
+            shell.intro = None
+    if readline:
+        try:
+            readline.write_history_file(history_file)
+        except OSError:
+            pass
+
+
+def dispatch(argv):
+    if argv and argv[0] == "--startup-time":
+        report_startup_time(argv[1:])
+        return
+
+    if not argv:
+        print("Usage: alltool <command> [args]")
+        print(f"Available commands: {', '.join(COMMANDS)}")
+        return
+
+    entry = COMMANDS.get(argv[0])
+    if entry is None:
+        print(f"❌ Unknown command: {argv[0]}")
         print("Use 'alltool help [language]' to see available commands.")
+        return
+    entry["handler"](argv[1:])
+
+
+def main():
+    argv = sys.argv[1:]
+    if (
+        argv
+        and argv[0] not in LOCAL_COMMANDS
+        and not os.environ.get("ALLTOOL_NO_DAEMON")
+    ):
+        code = run_in_daemon(argv)
+        if code is not None:
+            sys.exit(code)
+    dispatch(argv)
 
 
-main()
+if __name__ == "__main__":
+    main()
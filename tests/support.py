@@ -0,0 +1,86 @@
+"""Helpers for running AllTool against local stand-ins instead of real services."""
+
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALLTOOL = os.path.join(ROOT, "AllTools.py")
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+HAS_REQUESTS = importlib.util.find_spec("requests") is not None
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class StandIn:
+    """HTTP/1.1 (keep-alive) server answering from a route table.
+
+    routes maps a path to (status, body) or to a callable(query) returning one.
+    Requests and accepted connections are counted for assertions.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+        self.connections = 0
+        lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with lock:
+                    stand_in.connections += 1
+
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                with lock:
+                    stand_in.requests.append(self.path)
+                route = stand_in.routes.get(path, (404, b"not found"))
+                status, body = route(query) if callable(route) else route
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        # Clients dropping a keep-alive connection are expected, not errors
+        self.server.handle_error = lambda request, client_address: None
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_alltool(args, home, env=None, cwd=None, timeout=60):
+    # A private HOME keeps caches and databases out of the real ~/.cache and ~/.local
+    full_env = dict(os.environ, HOME=home, ALLTOOL_NO_DAEMON="1")
+    full_env.update(env or {})
+    return subprocess.run(
+        [sys.executable, ALLTOOL, *args],
+        env=full_env,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
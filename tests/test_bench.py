@@ -0,0 +1,32 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from support import run_alltool
+
+
+@unittest.skipUnless(shutil.which("gcc"), "gcc is not installed")
+class BenchJsonTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.home = tmp.name
+        self.source = os.path.join(tmp.name, "noop.c")
+        with open(self.source, "w") as f:
+            f.write("int main(void) { return 0; }\n")
+
+    def test_json_report_is_the_only_stdout_output(self):
+        # First run compiles, second one hits the build cache; both print build messages
+        for message in ("Compiling", "Build cache hit"):
+            result = run_alltool(["run", "--bench", "2", "--json", self.source], self.home)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            report = json.loads(result.stdout)
+            self.assertEqual(report["runs"], 2)
+            self.assertEqual(len(report["samples"]), 2)
+            self.assertIn(message, result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+
+from support import ROOT, run_alltool
+
+sys.path.insert(0, ROOT)
+import AllTools  # noqa: E402
+
+# Stands in for yt-dlp: .../ok/<name> downloads, .../flaky/<name> fails on the
+# first try only, anything else fails every time
+FAKE_YT_DLP = textwrap.dedent(
+    """\
+    #!{python}
+    import os, sys
+    args = sys.argv[1:]
+    url = args[-1]
+    assert args[-2] == "--", "URL not separated from options"
+    info_path = args[args.index("--print-to-file") + 2]
+    kind, name = url.rstrip("/").split("/")[-2:]
+    tries = name + ".tries"
+    count = int(open(tries).read()) + 1 if os.path.exists(tries) else 1
+    open(tries, "w").write(str(count))
+    if kind == "flaky" and count == 1 or kind not in ("ok", "flaky"):
+        print("ERROR: stand-in failure", file=sys.stderr)
+        sys.exit(1)
+    with open(name + ".mp4", "wb") as f:
+        f.write(b"\\0" * 4096)
+    with open(info_path, "a") as f:
+        f.write("Generic\\t%s\\t%s.mp4\\n" % (name, name))
+    """
+)
+
+
+class DownloadQueueTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.queue = AllTools.DownloadQueue(os.path.join(tmp.name, "downloads.db"))
+        self.addCleanup(self.queue.close)
+
+    def status(self, url):
+        return self.queue.db.execute(
+            "SELECT status, attempts, next_try, error FROM queue WHERE url=?", (url,)
+        ).fetchone()
+
+    def test_failure_is_retried_with_exponential_backoff(self):
+        self.queue.add(["https://example.com/a"], "/tmp")
+        delays = []
+        for attempts in (1, 2, 3):
+            item_id, url, *_ = self.force_claim()
+            before = time.time()
+            self.assertEqual(self.queue.fail(item_id, attempts, "boom", max_attempts=4), "queued")
+            delays.append(self.status(url)[2] - before)
+        for delay, expected in zip(delays, (10, 20, 40)):
+            self.assertAlmostEqual(delay, expected, delta=1)
+        # Not due yet, so nothing is handed out
+        self.assertEqual(self.queue.claim(1), [])
+
+    def test_backoff_is_capped(self):
+        self.queue.add(["https://example.com/a"], "/tmp")
+        [(item_id, url, *_)] = self.queue.claim(1)
+        before = time.time()
+        self.queue.fail(item_id, 12, "boom", max_attempts=20)
+        self.assertAlmostEqual(self.status(url)[2] - before, 600, delta=1)
+
+    def test_gives_up_after_max_attempts(self):
+        self.queue.add(["https://example.com/a"], "/tmp")
+        [(item_id, url, *_)] = self.queue.claim(1)
+        self.assertEqual(self.queue.fail(item_id, 3, "boom", max_attempts=3), "failed")
+        self.assertEqual(self.status(url)[:2], ("failed", 3))
+        self.assertIsNone(self.queue.next_retry())
+
+    def test_interrupted_items_are_recovered(self):
+        self.queue.add(["https://example.com/a"], "/tmp")
+        self.queue.claim(1)
+        self.assertEqual(self.queue.recover(), 1)
+        self.assertEqual(self.status("https://example.com/a")[0], "queued")
+
+    def test_re_adding_finished_or_failed_urls_queues_them_again(self):
+        urls = ["https://example.com/done", "https://example.com/failed", "https://example.com/running"]
+        self.assertEqual(self.queue.add(urls, "/tmp"), 3)
+        ids = {url: item_id for item_id, url, *_ in self.queue.claim(3)}
+        self.queue.finish(ids[urls[0]], "/tmp/done.mp4", 1)
+        self.queue.fail(ids[urls[1]], 3, "boom", max_attempts=3)
+
+        self.assertEqual(self.queue.add(urls, "/srv"), 2)
+        self.assertEqual(self.status(urls[0]), ("queued", 0, 0, None))
+        self.assertEqual(self.status(urls[1]), ("queued", 0, 0, None))
+        self.assertEqual(self.status(urls[2])[0], "running")
+        # Queued items are not duplicated either
+        self.assertEqual(self.queue.add(urls[:1], "/srv"), 0)
+
+    def force_claim(self):
+        # Skip the backoff wait: make queued items due now
+        with self.queue.db:
+            self.queue.db.execute("UPDATE queue SET next_try=0 WHERE status='queued'")
+        return self.queue.claim(1)[0]
+
+
+class DownloadQueueRunTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.home = os.path.join(tmp.name, "home")
+        self.work = os.path.join(tmp.name, "work")
+        bin_dir = os.path.join(tmp.name, "bin")
+        for path in (self.home, self.work, bin_dir):
+            os.makedirs(path)
+        yt_dlp = os.path.join(bin_dir, "yt-dlp")
+        with open(yt_dlp, "w") as f:
+            f.write(FAKE_YT_DLP.format(python=sys.executable))
+        os.chmod(yt_dlp, 0o755)
+        self.env = {"PATH": bin_dir + os.pathsep + os.environ.get("PATH", "")}
+
+    def alltool(self, *args):
+        return run_alltool(
+            ["downloadvs", "--queue", *args], self.home, self.env, cwd=self.work, timeout=120
+        )
+
+    def rows(self):
+        db = sqlite3.connect(os.path.join(self.home, ".local/share/alltool/downloads.db"))
+        try:
+            return dict(
+                (url.rsplit("/", 1)[-1], (status, attempts))
+                for url, status, attempts in db.execute("SELECT url, status, attempts FROM queue")
+            )
+        finally:
+            db.close()
+
+    def test_run_retries_failures_then_gives_up(self):
+        urls = ["https://example.com/ok/one", "https://example.com/flaky/two", "https://example.com/bad/three"]
+        self.assertIn("Queued 3 URLs", self.alltool("add", *urls).stdout)
+
+        result = self.alltool("run", "-j", "3", "--retries", "1")
+        self.assertEqual(result.returncode, 1, result.stdout)
+        self.assertIn("retrying (attempt 2/2)", result.stdout)
+        self.assertIn("giving up", result.stdout)
+        self.assertEqual(
+            self.rows(), {"one": ("done", 0), "two": ("done", 1), "three": ("failed", 2)}
+        )
+        for name, tries in (("one", 1), ("two", 2), ("three", 2)):
+            with open(os.path.join(self.work, name + ".tries")) as f:
+                self.assertEqual(int(f.read()), tries)
+        self.assertTrue(os.path.isfile(os.path.join(self.work, "two.mp4")))
+
+        # A failed URL can be queued again; a downloaded one is skipped via the archive
+        out = self.alltool("add", *urls).stdout
+        self.assertIn("Queued 1 URLs (2 already downloaded", out)
+        self.assertEqual(self.rows()["three"], ("queued", 0))
+
+    def test_forced_add_downloads_archived_urls_again(self):
+        url = "https://example.com/ok/one"
+        self.alltool("add", url)
+        self.alltool("run")
+        self.assertIn("1 already downloaded", self.alltool("add", url).stdout)
+
+        self.assertIn("Queued 1 URLs", self.alltool("add", "--force", url).stdout)
+        result = self.alltool("run")
+        self.assertNotIn("Already downloaded", result.stdout)
+        self.assertEqual(self.rows(), {"one": ("done", 0)})
+        with open(os.path.join(self.work, "one.tries")) as f:
+            self.assertEqual(int(f.read()), 2)
+
+    def test_add_rejects_options_instead_of_queueing_them(self):
+        out = self.alltool("add", "--bogus", "https://example.com/ok/one").stdout
+        self.assertIn("Unknown option: --bogus", out)
+        self.assertFalse(os.path.exists(os.path.join(self.home, ".local/share/alltool/downloads.db")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from support import run_alltool
+
+
+class HashCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.home = tmp.name
+        self.cache_db = os.path.join(self.home, ".cache", "alltool", "hashes.db")
+        self.file = os.path.join(tmp.name, "data.bin")
+        with open(self.file, "wb") as f:
+            f.write(b"alltool" * 1000)
+
+    def test_usage_errors_do_not_create_the_cache(self):
+        for args in (["hs"], ["hs", "missing.bin", "sha256"], ["hs", "-r", "missing", "sha256"],
+                     ["hs", self.file, "crc32"], ["dup"], ["dup", "missing"],
+                     ["dup", self.home, "--type", "crc32"], ["dup", self.home, "-j", "x"]):
+            run_alltool(args, self.home)
+            self.assertFalse(os.path.exists(self.cache_db), args)
+
+    def test_second_run_is_a_cache_hit(self):
+        digest = hashlib.sha256(b"alltool" * 1000).hexdigest()
+        first = run_alltool(["hs", self.file, "sha256"], self.home).stdout
+        self.assertIn(digest, first)
+        self.assertIn("0 hits, 1 misses", first)
+        second = run_alltool(["hs", self.file, "sha256"], self.home).stdout
+        self.assertIn(digest, second)
+        self.assertIn("1 hits, 0 misses", second)
+
+    def test_bad_manifest_path_and_worker_counts_are_reported(self):
+        result = run_alltool(["hs", "-r", self.home, "sha256", "-o", "/nonexistent/m.txt"], self.home)
+        self.assertIn("Cannot write manifest", result.stdout)
+        self.assertNotIn("Traceback", result.stderr)
+        for args in (["hs", "-r", self.home, "sha256", "-j", "-1"], ["dup", self.home, "-j", "0"]):
+            result = run_alltool(args, self.home)
+            self.assertIn("-j needs a number of workers (1 or more)", result.stdout, args)
+            self.assertNotIn("Traceback", result.stderr)
+
+
+class ManifestCheckTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        with open(os.path.join(self.dir, "a.txt"), "wb") as f:
+            f.write(b"hello\n")
+        self.blake2b = hashlib.blake2b(b"hello\n").hexdigest()
+        self.sha512 = hashlib.sha512(b"hello\n").hexdigest()
+
+    def check(self, manifest_name, digest, *args):
+        manifest = os.path.join(self.dir, manifest_name)
+        with open(manifest, "w") as f:
+            f.write(f"{digest}  a.txt\n")
+        return run_alltool(["hs", "--check", manifest, *args], self.dir, cwd=self.dir)
+
+    def test_b2sums_manifest_verifies(self):
+        result = self.check("B2SUMS", self.blake2b)
+        self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertIn("a.txt: OK", result.stdout)
+
+    def test_sha512sums_manifest_verifies(self):
+        self.assertEqual(self.check("SHA512SUMS", self.sha512).returncode, 0)
+
+    def test_128_digit_digest_needs_a_type(self):
+        result = self.check("checksums.txt", self.blake2b)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("unknown hash type, use --type", result.stdout)
+        self.assertNotIn("FAILED", result.stdout)
+        self.assertEqual(self.check("checksums.txt", self.blake2b, "--type", "blake2b").returncode, 0)
+
+    def test_missing_option_values_are_named(self):
+        self.assertIn("--check needs a value", run_alltool(["hs", "--check"], self.dir).stdout)
+        out = run_alltool(["hs", "a.txt", "sha256", "-j", "many"], self.dir).stdout
+        self.assertIn("-j needs a number of workers", out)
+
+
+if __name__ == "__main__":
+    unittest.main()
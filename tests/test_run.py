@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from support import run_alltool
+
+# sqrt of a runtime value can't be folded away, so this needs libm at link time
+NEEDS_LIBM = """\
+#include <math.h>
+#include <stdio.h>
+int main(int argc, char **argv) {
+    (void)argv;
+    printf("%.3f\\n", sqrt((double)argc + 1.0) + cos((double)argc));
+    return 0;
+}
+"""
+
+
+@unittest.skipUnless(shutil.which("gcc"), "gcc is not installed")
+class RunBuildTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.home = tmp.name
+        self.source = os.path.join(tmp.name, "m.c")
+        with open(self.source, "w") as f:
+            f.write(NEEDS_LIBM)
+
+    def test_link_flags_from_cflags_are_applied(self):
+        result = run_alltool(["run", "--cflags", "-O2 -lm", self.source], self.home)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertNotIn("Compilation failed", result.stdout)
+        self.assertIn("1.955", result.stdout)  # sqrt(2) + cos(1)
+
+    def test_jobs_below_one_are_rejected(self):
+        result = run_alltool(["run", "--jobs", "-1", self.source], self.home)
+        self.assertIn("--jobs needs a number of workers (1 or more)", result.stdout)
+        self.assertNotIn("Traceback", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import tempfile
+import unittest
+
+from support import HAS_REQUESTS, StandIn, fixture, run_alltool
+
+EMPTY_PAGE = b"<html><body><div id='links' class='results'></div></body></html>"
+
+
+@unittest.skipUnless(HAS_REQUESTS, "requests is not installed")
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        home = tempfile.TemporaryDirectory()
+        self.addCleanup(home.cleanup)
+        self.home = home.name
+        self.stand_in = StandIn({"/html/": (200, fixture("ddg_results.html"))})
+        self.stand_in.__enter__()
+        self.addCleanup(self.stand_in.__exit__, None, None, None)
+
+    def sr(self, *args):
+        return run_alltool(
+            ["sr", *args], self.home, {"ALLTOOL_SEARCH_URL": self.stand_in.url + "/html/"}
+        )
+
+    def test_results_come_from_the_page(self):
+        out = self.sr("python broken pipe").stdout
+        self.assertIn("1. How to prevent errno 32 broken pipe? - Stack Overflow", out)
+        self.assertIn("5. Fixing BrokenPipeError in Python scripts | Real Python", out)
+        self.assertNotIn("6. ", out)
+
+    def test_repeated_query_is_served_from_cache(self):
+        self.sr("python broken pipe")
+        out = self.sr("  Python   BROKEN pipe ").stdout
+        self.assertIn("💾 From cache", out)
+        self.assertIn("1. How to prevent errno 32 broken pipe?", out)
+        self.assertEqual(len(self.stand_in.requests), 1)
+
+    def test_offline_does_not_touch_the_network(self):
+        out = self.sr("never searched", "--offline").stdout
+        self.assertIn("No cached results", out)
+        self.assertEqual(self.stand_in.requests, [])
+
+    def test_offline_serves_cached_results(self):
+        self.sr("python broken pipe")
+        out = self.sr("python broken pipe", "--offline").stdout
+        self.assertIn("💾 From cache", out)
+        self.assertEqual(len(self.stand_in.requests), 1)
+
+    def test_empty_results_are_not_cached(self):
+        self.stand_in.routes["/html/"] = (200, EMPTY_PAGE)
+        self.assertIn("No results found", self.sr("captcha").stdout)
+        self.stand_in.routes["/html/"] = (200, fixture("ddg_results.html"))
+        out = self.sr("captcha").stdout
+        self.assertNotIn("From cache", out)
+        self.assertIn("1. How to prevent errno 32 broken pipe?", out)
+        self.assertEqual(len(self.stand_in.requests), 2)
+
+    def test_batch_writes_one_json_object_per_query(self):
+        self.sr("cached query")
+        result = self.sr("-q", "cached query", "-q", "fresh query", "--rate", "100")
+        self.assertEqual(result.returncode, 0)
+        records = {r["query"]: r for r in map(json.loads, result.stdout.splitlines())}
+        self.assertEqual(set(records), {"cached query", "fresh query"})
+        self.assertTrue(records["cached query"]["cached"])
+        self.assertFalse(records["fresh query"]["cached"])
+        self.assertEqual(len(records["fresh query"]["results"]), 5)
+
+    def test_batch_reuses_one_connection(self):
+        # Padding after the results keeps body bytes unread when parsing stops
+        page = fixture("ddg_results.html") + b"<!--" + b"x" * 200_000 + b"-->"
+        self.stand_in.routes["/html/"] = (200, page)
+        queries = [arg for i in range(5) for arg in ("-q", f"query {i}")]
+        result = self.sr(*queries, "--jobs", "1", "--rate", "100")
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(len(self.stand_in.requests), 5)
+        self.assertEqual(self.stand_in.connections, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
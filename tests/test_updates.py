@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+import textwrap
+import unittest
+
+from support import run_alltool
+
+FAKE_APT = textwrap.dedent(
+    """\
+    #!/bin/sh
+    if [ "$1" = update ]; then
+        [ -n "$APT_UPDATE_FAILS" ] || exit 0
+        echo "E: Could not open lock file /var/lib/apt/lists/lock - open (13: Permission denied)" >&2
+        exit 100
+    fi
+    echo "Listing..."
+    echo "curl/stable 8.5.0-2 amd64 [upgradable from: 8.4.0-1]"
+    """
+)
+
+# Drops -n and runs the command, so the test behaves the same as root or not
+FAKE_SUDO = '#!/bin/sh\n[ "$1" = -n ] && shift\nexec "$@"\n'
+
+
+class UpdateCheckTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.home = os.path.join(tmp.name, "home")
+        bin_dir = os.path.join(tmp.name, "bin")
+        os.makedirs(self.home)
+        os.makedirs(bin_dir)
+        for name, script in (("apt", FAKE_APT), ("sudo", FAKE_SUDO)):
+            path = os.path.join(bin_dir, name)
+            with open(path, "w") as f:
+                f.write(script)
+            os.chmod(path, 0o755)
+        self.env = {"PATH": bin_dir + os.pathsep + os.environ.get("PATH", "")}
+
+    def up(self, *args, **env):
+        return run_alltool(["up", *args], self.home, dict(self.env, **env)).stdout
+
+    def test_successful_refresh(self):
+        report = json.loads(self.up("--refresh", "--json"))
+        self.assertEqual(report["manager"], "apt")
+        self.assertEqual(report["packages"][0]["name"], "curl")
+        self.assertNotIn("refresh_failed", report)
+
+    def test_failed_apt_update_is_reported(self):
+        report = json.loads(self.up("--refresh", "--json", APT_UPDATE_FAILS="1"))
+        self.assertIn("Permission denied", report["refresh_failed"])
+        # The cached report keeps the flag for later calls
+        out = self.up()
+        self.assertIn("could not be refreshed", out)
+        self.assertIn("curl", out)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from support import HAS_REQUESTS, StandIn, run_alltool
+
+
+@unittest.skipUnless(HAS_REQUESTS, "requests is not installed")
+class WeatherTest(unittest.TestCase):
+    def setUp(self):
+        home = tempfile.TemporaryDirectory()
+        self.addCleanup(home.cleanup)
+        self.home = home.name
+        self.cache_file = os.path.join(self.home, ".cache", "alltool", "weather.json")
+        self.forecast = "☀️ +20°C"
+        self.stand_in = StandIn({"/Paris": lambda query: (200, self.forecast.encode())})
+        self.stand_in.__enter__()
+        self.addCleanup(self.stand_in.__exit__, None, None, None)
+
+    def wea(self, *args, ttl=None):
+        env = {"ALLTOOL_WEATHER_URL": self.stand_in.url}
+        if ttl is not None:
+            env["ALLTOOL_WEATHER_TTL"] = str(ttl)
+        return run_alltool(["wea", *args], self.home, env).stdout
+
+    def cached_text(self, city):
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)[city]["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def wait_for_cache(self, city, text, timeout=15):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.cached_text(city) == text:
+                return
+            time.sleep(0.1)
+        self.fail(f"cache still holds {self.cached_text(city)!r}, expected {text!r}")
+
+    def test_fresh_entry_is_served_without_a_request(self):
+        self.assertIn("☀️ +20°C", self.wea("Paris"))
+        self.assertEqual(self.cached_text("paris"), "☀️ +20°C")
+        out = self.wea("Paris")
+        self.assertIn("☀️ +20°C", out)
+        self.assertNotIn("refreshing", out)
+        self.assertEqual(len(self.stand_in.requests), 1)
+
+    def test_stale_entry_is_shown_then_refreshed(self):
+        self.wea("Paris")
+        self.forecast = "🌧️ +12°C"
+        time.sleep(0.05)
+
+        # The stale value comes back at once, the new one lands in the cache afterwards
+        out = self.wea("Paris", ttl=0)
+        self.assertIn("☀️ +20°C", out)
+        self.assertIn("refreshing", out)
+        self.wait_for_cache("paris", "🌧️ +12°C")
+
+        out = self.wea("Paris")
+        self.assertIn("🌧️ +12°C", out)
+        self.assertNotIn("refreshing", out)
+        self.assertEqual(len(self.stand_in.requests), 2)
+
+    def test_refresh_flag_skips_the_cache(self):
+        self.wea("Paris")
+        self.forecast = "🌧️ +12°C"
+        self.assertIn("🌧️ +12°C", self.wea("Paris", "--refresh"))
+        self.assertEqual(self.cached_text("paris"), "🌧️ +12°C")
+
+
+if __name__ == "__main__":
+    unittest.main()